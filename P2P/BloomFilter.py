@@ -0,0 +1,49 @@
+import math
+import numpy as np
+
+# bit array summary of one posting list: a doc id that is in the list always passes,
+# one that is not passes with about the false positive rate it was sized for
+
+# odd 64-bit multipliers for the two hashes, every probe is h1 + i * h2 (double hashing)
+HASH_A = np.uint64(0x9E3779B97F4A7C15)
+HASH_B = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+class BloomFilter():
+    def __init__(self, bits, hashes, array=None):
+        self.bits = max(8, int(bits))
+        self.hashes = max(1, int(hashes))
+        self.array = array if array is not None else np.zeros((self.bits + 7) // 8 * 8, dtype=bool)
+
+    @classmethod
+    def for_items(cls, items, false_positive):
+        # the usual sizing, m = -n ln p / ln(2)^2 bits and k = m / n ln 2 hashes
+        items_len = max(1, len(items))
+        bits = math.ceil(-items_len * math.log(false_positive) / math.log(2) ** 2)
+        hashes = round(bits / items_len * math.log(2))
+        bloom_filter = cls(bits, hashes)
+        bloom_filter.add(items)
+        return bloom_filter
+
+    def positions(self, items):
+        items = np.asarray(items, dtype=np.uint64) + np.uint64(1)
+        first = items * HASH_A
+        second = (items * HASH_B) | np.uint64(1)
+        probes = np.arange(self.hashes, dtype=np.uint64)
+        return (first[:, None] + probes[None, :] * second[:, None]) % np.uint64(self.bits)
+
+    def add(self, items):
+        if len(items):
+            self.array[self.positions(items).ravel()] = True
+
+    def contains(self, items):
+        if not len(items):
+            return np.zeros(0, dtype=bool)
+        return self.array[self.positions(items)].all(axis=1)
+
+    def to_bytes(self):
+        return np.packbits(self.array).tobytes()
+
+    @classmethod
+    def from_bytes(cls, bits, hashes, data):
+        return cls(bits, hashes, np.unpackbits(np.frombuffer(data, dtype=np.uint8)).astype(bool))
@@ -2,57 +2,263 @@ import json
 import argparse
 from collections import Counter
 import numpy as np
-from utils import PageNode, convert_to_page_subgraph, load_subgraph_file
+from utils import load_subgraph_file, convert_results_ranking_to_dict
 import zmq
 from P2P import message_pb2
+from P2P.InvertedIndex import InvertedIndex
+from P2P.BloomFilter import BloomFilter
+from P2P.QueryCache import QueryCache
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 import random
+import math
+import time
+import os
+import zlib
 
 class IncrementalSearch():
+    # first frame of every message on the PULL socket
+    HOP = b"hop"
+    TERMS = b"terms"
+    BLOOM = b"bloom"
+    # seconds between two looks at the ranks folder
+    RANKS_CHECK = 1
+
     def __init__(self, args, logger):
-        self.document_graph, self.total_docs = convert_to_page_subgraph(
-            args.file_name, args.subgraph)
         self.logger = logger
         self.port = args.port
         self.addr = args.addr
         self.subgraph = args.subgraph
         self.subgraph_info = load_subgraph_file(args.subgraph_file)
         self.folder = args.folder
-        self.push = None
+        self.peers = sorted(int(subgraph_id) for subgraph_id in self.subgraph_info)
+        # every lookup is served from memory, the corpus files are parsed once here and only
+        # the posting lists of the words this peer owns are kept
+        self.index = InvertedIndex(args.word_file, args.index_file, args.file_name, owns=self.owns)
+        self.ranks_stamp = None
+        self.ranks_version = 0
+        self.next_ranks_check = time.time() + self.RANKS_CHECK
+        self.load_ranks()
+        # posting list lengths of every word for planning queries, the other peers send theirs at startup
+        self.lengths = np.diff(self.index.indptr)
+        self.terms_from = set()
+        self.logger.info(f"IncrementalSearch - kept {len(self.index.indices)} postings of {np.count_nonzero(self.lengths)} "
+                         f"of {len(self.index)} words over {len(self.index.doc_names)} documents")
+        self.percent = args.percent
+        self.top_k = args.top_k
+        self.window = args.window
+        self.idle_timeout = args.idle_timeout
+        self.query_timeout = args.query_timeout
+        self.startup_timeout = args.startup_timeout
+        self.queries = []
+        self.next_query = 0
+        self.in_flight = {}
+        self.latencies = []
+        self.results = {}
+        self.local_hops = deque()
+        self.counters = Counter()
+        self.bloom_fp = args.bloom_fp
+        self.filters = {}
+        self.filters_from = set()
+        # filters of a numbering this peer has not loaded yet, by version and sender
+        self.early_filters = defaultdict(dict)
+        # repeated queries are answered here, new ranks empty the cache
+        self.cache = QueryCache(args.cache_size, args.cache_ttl)
+        if self.bloom_fp:
+            self.build_filters()
+        self.push = {}
         self.pull = None
 
+    def ranks_files(self):
+        if not os.path.isdir(self.folder):
+            return None
+        return tuple(sorted((file, os.stat(f"{self.folder}/{file}").st_mtime_ns)
+                            for file in os.listdir(self.folder) if "json" in file))
+
+    def load_ranks(self):
+        stamp = self.ranks_files()
+        if stamp is None:
+            self.logger.warning(f"IncrementalSearch::load_ranks - no ranks in {self.folder}, hits stay in document order")
+        else:
+            self.index.order_by_rank(convert_results_ranking_to_dict(self.folder))
+            self.logger.info(f"IncrementalSearch::load_ranks - posting lists ordered by the ranks in {self.folder}")
+        self.ranks_stamp = stamp
+        # order_by_rank breaks ties by graph file position, so peers that loaded the same ranks
+        # number the documents the same way, whatever they loaded before
+        self.ranks_version = zlib.crc32("\n".join(self.index.doc_names).encode())
+
+    def check_ranks(self, force=False):
+        now = time.time()
+        if not force and now < self.next_ranks_check:
+            return
+        self.next_ranks_check = now + self.RANKS_CHECK
+        if self.ranks_files() == self.ranks_stamp:
+            return
+
+        version = self.ranks_version
+        try:
+            self.load_ranks()
+        except ValueError as e:
+            # a ranks file that is still being written is read again on the next check
+            self.logger.warning(f"IncrementalSearch::check_ranks - ranks in {self.folder} not readable yet: {e}")
+            return
+        if self.ranks_version == version:
+            return
+
+        # every doc id means another document now, so the cached hits and Bloom filters are rebuilt
+        self.logger.info(f"IncrementalSearch::check_ranks - new ranks in {self.folder}, documents renumbered "
+                         f"to version {self.ranks_version}")
+        self.cache.clear()
+        if self.bloom_fp:
+            self.filters = {}
+            self.build_filters()
+            self.send_filters()
+            for bloom_req in self.early_filters.pop(self.ranks_version, {}).values():
+                self.apply_filters(bloom_req)
+            self.early_filters.clear()
+
     def configure(self):
         self.logger.info("PeerNode_ks::configure")
         context = zmq.Context()
         self.poller = zmq.Poller()
 
+        # every peer pulls the hops addressed to it, and pushes to each other peer on its own socket
         self.logger.debug(
-            "PeerNode_ks::configure - obtain REP and REQ sockets")
+            f"PeerNode_ks::configure - bind the PULL at {self.addr}:{self.port}")
         self.pull = context.socket(zmq.PULL)
-        
+        bind_string = "tcp://*:" + str(self.port)
+        self.pull.bind(bind_string)
+        self.poller.register(self.pull, zmq.POLLIN)
+
         for subgraph_id in self.subgraph_info:
             if int(subgraph_id) != self.subgraph:
-                self.logger.debug(f"PeerNode_ks::configure - connecting PULL to {self.subgraph_info[subgraph_id]}")
-                self.pull.connect("tcp://" + self.subgraph_info[subgraph_id])
-
-        self.push = context.socket(zmq.PUSH)
-
-        self.logger.debug(
-            f"PeerNode_ks::configure - bind the PUSH at {self.addr}:{self.port}")
-        bind_string = "tcp://*:" + str(self.port)
-        self.push.bind(bind_string)
+                self.logger.debug(f"PeerNode_ks::configure - connecting PUSH to {self.subgraph_info[subgraph_id]}")
+                push = context.socket(zmq.PUSH)
+                # hops queued for a peer that is down are dropped at exit instead of blocking it
+                push.setsockopt(zmq.LINGER, 0)
+                push.connect("tcp://" + self.subgraph_info[subgraph_id])
+                self.push[int(subgraph_id)] = push
 
         self.logger.info("PeerNode_ks::configure completed")
 
     def driver(self, args):
         self.configure()
-        # self.calculate_pagerank()
-        queries = self.generate_query(args)
-
-        for query in queries:
-            for word in query:
-                self.incremental_search(args.percent, word)
+        self.send_terms()
+        self.send_filters()
+        self.wait_for_peers()
+        self.queries = self.generate_query(args)
+        self.start_time = time.time()
+        self.drain()
+        self.event_loop()
+        self.report()
+
+    def send_terms(self):
+        terms_req = message_pb2.termsReq()
+        terms_req.subgraph_id = self.subgraph
+        owned = np.flatnonzero(self.lengths)
+        terms_req.word_ids[:] = owned.tolist()
+        terms_req.lengths[:] = self.lengths[owned].tolist()
+
+        buf2send = terms_req.SerializeToString()
+        for destination, push in self.push.items():
+            try:
+                push.send_multipart([self.TERMS, buf2send], flags=zmq.NOBLOCK)
+            except zmq.ZMQError as e:
+                self.logger.info(e)
+        self.logger.info(f"IncrementalSearch::send_terms - lengths of {len(owned)} posting lists, {len(buf2send)} bytes to every peer")
+
+    def wait_for_peers(self):
+        # hops of peers that are already querying are served meanwhile, a word whose length
+        # has not arrived is planned as if its posting list were empty, and candidates for a
+        # word whose filter has not arrived are forwarded unfiltered
+        start = time.time()
+        others = set(self.peers) - {self.subgraph}
+        while self.missing(others):
+            if time.time() - start > self.startup_timeout:
+                self.logger.warning(f"IncrementalSearch::wait_for_peers - nothing from {self.missing(others)}")
+                break
+            events = dict(self.poller.poll(timeout=100))
+            if self.pull in events:
+                self.receive_pending()
+                self.drain()
+
+        self.logger.info(f"IncrementalSearch::wait_for_peers - lengths from {len(self.terms_from)} peers, "
+                         f"{len(self.filters)} filters after {time.time() - start:.2f} seconds")
+
+    def missing(self, others):
+        missing = others - self.terms_from
+        if self.bloom_fp:
+            missing |= others - self.filters_from
+        return sorted(missing)
+
+    def handle_terms(self, bytes_rcvd):
+        terms_req = message_pb2.termsReq()
+        terms_req.ParseFromString(bytes_rcvd)
+        self.terms_from.add(terms_req.subgraph_id)
+        self.lengths[list(terms_req.word_ids)] = list(terms_req.lengths)
+
+    def build_filters(self):
+        # the index holds only the posting lists this peer owns
+        for word_id in range(len(self.index)):
+            docs = self.index.postings(word_id)
+            if len(docs):
+                self.filters[word_id] = BloomFilter.for_items(docs, self.bloom_fp)
+
+    def filter_message(self):
+        bloom_req = message_pb2.bloomReq()
+        bloom_req.subgraph_id = self.subgraph
+        bloom_req.ranks_version = self.ranks_version
+        for word_id, bloom_filter in self.filters.items():
+            if self.owns(word_id):
+                bloom_req.word_ids.append(word_id)
+                bloom_req.bits.append(bloom_filter.bits)
+                bloom_req.hashes.append(bloom_filter.hashes)
+                bloom_req.filters.append(bloom_filter.to_bytes())
+        return bloom_req.SerializeToString()
+
+    def send_filters(self):
+        if not self.bloom_fp:
+            return
+
+        buf2send = self.filter_message()
+        for destination, push in self.push.items():
+            try:
+                push.send_multipart([self.BLOOM, buf2send], flags=zmq.NOBLOCK)
+                self.counters["filter_bytes_sent"] += len(buf2send)
+            except zmq.ZMQError as e:
+                self.logger.info(e)
+        self.logger.info(f"IncrementalSearch::send_filters - {len(self.filters)} filters, {len(buf2send)} bytes to every peer")
+
+    def handle_filters(self, bytes_rcvd):
+        bloom_req = message_pb2.bloomReq()
+        bloom_req.ParseFromString(bytes_rcvd)
+        self.filters_from.add(bloom_req.subgraph_id)
+        if bloom_req.ranks_version == self.ranks_version:
+            self.apply_filters(bloom_req)
+        else:
+            self.early_filters[bloom_req.ranks_version][bloom_req.subgraph_id] = bloom_req
+
+    def apply_filters(self, bloom_req):
+        for word_id, bits, hashes, data in zip(bloom_req.word_ids, bloom_req.bits, bloom_req.hashes, bloom_req.filters):
+            self.filters[word_id] = BloomFilter.from_bytes(bits, hashes, data)
+
+    def prefilter(self, hits, word_ids):
+        # a final hit is in every remaining posting list, drop the candidates the owners'
+        # filters rule out before they travel
+        for word_id in word_ids:
+            bloom_filter = self.filters.get(word_id)
+            if bloom_filter is not None and len(hits):
+                kept = hits[bloom_filter.contains(hits)]
+                self.counters["pruned"] += len(hits) - len(kept)
+                hits = kept
+        return hits
+
+    def owner(self, word_id):
+        # every peer owns the posting lists of the words that hash to it
+        return self.peers[word_id % len(self.peers)]
+
+    def owns(self, word_id):
+        return self.owner(word_id) == self.subgraph
 
     def generate_query(self, args):
         queries = []
@@ -66,69 +272,221 @@ class IncrementalSearch():
 
         return queries
 
-    def incremental_search(self, args, word):
-        docs = self.get_documents(word)
-        top_docs = docs[:args.percent*0.1]
-
-        return top_docs
-
-    def get_documents(self, word):
-        # get the word index for term in search query 
-        word_index = 0
-        with open("../corpus/word_to_index") as f:
-            word_index = json.load(f)[word]
-
-        # is the peer responsible for this word index?
-        for i in range(50):
-            json_file = f"{i}.json"
-
-            node_ids = []
-            with open(f"../P2P_ks_results/{json_file}") as jf:
-                peer_file = json.load(jf)
-                node_ids = peer_file.keys()
-
-            doc_ids = []
-            with open("../graph_ks_docs.json") as gk:
-                node_to_doc = json.load(gk)
-                for node in node_to_doc:
-                    doc_ids.append(node['doc'])
-
-            if word_index in doc_ids:
-                with open("../index_to_doc.json") as itd:
-                    return json.load(itd)[str(word_index)]
-
-        return []
-
-    def send_document_hits(self, documents):
-        document_req = message_pb2.docReq()
-        document_req.documents[:] = documents
-
+    def drain(self):
+        # hops owned by this peer are queued instead of handled recursively
+        self.start_queries()
+        while self.local_hops:
+            self.handle_document_hits(self.local_hops.popleft())
+            self.start_queries()
+
+    def start_queries(self):
+        # keep at most window queries of this peer in flight
+        while self.next_query < len(self.queries) and len(self.in_flight) < self.window:
+            query_id = self.next_query
+            self.next_query += 1
+            self.in_flight[query_id] = time.time()
+            self.start_query(query_id, self.queries[query_id])
+
+    def start_query(self, query_id, query):
+        cached = self.cache.get(QueryCache.key(query))
+        if cached is not None:
+            self.finish_query(query_id, cached)
+            return
+
+        word_ids = [self.index.word_id(word) for word in query]
+        if any(word_id is None for word_id in word_ids):
+            # a word outside the corpus leaves nothing to intersect
+            self.finish_query(query_id, [])
+            return
+
+        # shortest posting list first, so the candidates shrink as early as possible
+        word_ids = sorted(set(word_ids), key=lambda word_id: self.lengths[word_id])
+        doc_req = message_pb2.docReq()
+        doc_req.subgraph_id = self.subgraph
+        doc_req.query_id = query_id
+        doc_req.origin = self.subgraph
+        doc_req.ranks_version = self.ranks_version
+        doc_req.terms[:] = word_ids
+        self.route(doc_req)
+
+    def route(self, doc_req):
+        destination = doc_req.origin if doc_req.done else self.owner(doc_req.terms[0])
+        if destination == self.subgraph:
+            self.local_hops.append(doc_req)
+        else:
+            self.send_document_hits(destination, doc_req)
+
+    def handle_document_hits(self, doc_req):
+        if doc_req.ranks_version != self.ranks_version:
+            self.check_ranks(force=True)
+        if doc_req.ranks_version != self.ranks_version:
+            self.handle_stale_hop(doc_req)
+            return
+
+        if doc_req.done:
+            hits = np.cumsum(np.fromiter(doc_req.doc_ids, dtype=np.int64, count=len(doc_req.doc_ids)))
+            self.finish_query(doc_req.query_id, hits, doc_req.hops)
+            return
+
+        candidates = None
+        if doc_req.hops:
+            candidates = np.cumsum(np.fromiter(doc_req.doc_ids, dtype=np.int32, count=len(doc_req.doc_ids)))
+
+        next_req = message_pb2.docReq()
+        next_req.subgraph_id = self.subgraph
+        next_req.query_id = doc_req.query_id
+        next_req.origin = doc_req.origin
+        next_req.ranks_version = doc_req.ranks_version
+        next_req.hops = doc_req.hops + 1
+        next_req.terms[:] = doc_req.terms[1:]
+        if next_req.terms:
+            # only the top share of the hits travels on to the owner of the next word
+            hits = self.incremental_search(doc_req.terms[0], candidates)
+            hits = self.top_hits(self.prefilter(hits, next_req.terms))
+        else:
+            hits = self.incremental_search(doc_req.terms[0], candidates, self.top_k)
+            next_req.done = True
+        next_req.doc_ids[:] = np.diff(hits, prepend=0).tolist()
+        self.route(next_req)
+
+    def handle_stale_hop(self, doc_req):
+        # doc ids of another numbering would intersect the wrong documents
+        self.counters["stale_hops"] += 1
+        if doc_req.origin == self.subgraph and doc_req.query_id in self.in_flight:
+            # this peer renumbered while its query was on the way, so the query starts over
+            self.counters["restarted"] += 1
+            self.start_query(doc_req.query_id, self.queries[doc_req.query_id])
+            return
+
+        self.logger.warning(f"IncrementalSearch::handle_stale_hop - dropped a hop of query {doc_req.query_id} "
+                            f"from peer {doc_req.origin} with ranks version {doc_req.ranks_version}, "
+                            f"this peer has {self.ranks_version}")
+
+    def finish_query(self, query_id, hits, hops=0):
+        started = self.in_flight.pop(query_id, None)
+        if started is None:
+            return
+
+        self.finish_time = time.time()
+        self.latencies.append(self.finish_time - started)
+        self.results[query_id] = hits
+        if hops:
+            self.cache.put(QueryCache.key(self.queries[query_id]), hits)
+        self.logger.debug(f"IncrementalSearch::finish_query - query {query_id} {self.queries[query_id]} "
+                          f"found {len(hits)} documents in {hops} hops")
+
+    def incremental_search(self, word_id, candidates=None, limit=0):
+        # hits of this word, restricted to the candidates forwarded by the previous hop,
+        # with a limit only the best limit of them are looked for
+        docs = self.index.postings(word_id)
+        if candidates is None:
+            return docs[:limit] if limit else docs
+        if limit:
+            return self.index.threshold_search(candidates, word_id, limit)
+        return np.intersect1d(candidates, docs, assume_unique=True)
+
+    def top_hits(self, hits):
+        # never fewer than the top_k the last hop is asked for
+        return hits[:max(self.top_k, math.ceil(len(hits) * self.percent / 100))]
+
+    def send_document_hits(self, destination, document_req):
         buf2send = document_req.SerializeToString()
         try:
-            self.push.send(buf2send)
+            self.push[destination].send_multipart([self.HOP, buf2send], flags=zmq.NOBLOCK)
+            self.counters["messages_sent"] += 1
+            self.counters["bytes_sent"] += len(buf2send)
         except zmq.ZMQError as e:
             self.logger.info(e)
 
-    # def event_loop(self):
-    #     try:
-    #         self.logger.info("PeerNode_ks::event_loop - run the event loop")
-    #         iters = 0
-    #         while True:
-    #             self.logger.info("PeerNode_ks::event_loop - run the event loop")
-    #             try:
-    #                 bytes_rcvd = self.pull.recv(flags=zmq.NOBLOCK)
-    #                 document_req = message_pb2.docReq()
-    #                 document_req.ParseFromString(bytes_rcvd)
-    #                 if self.iterations == iters:
-    #                     break
-    #                 iters += 1
-    #             except zmq.ZMQError as e:
-    #                 if e.errno == zmq.EAGAIN:
-    #                     self.logger.info("No message yet.")
-
-    #         self.logger.info("PeerNode_ks::event_loop - out of the event loop")
-    #     except Exception as e:
-    #         raise e
+    def event_loop(self):
+        try:
+            self.logger.info("PeerNode_ks::event_loop - run the event loop")
+            last_message = time.time()
+            while True:
+                self.check_ranks()
+                if self.expire_queries():
+                    self.drain()
+
+                # the peer keeps serving hops for the others until it has been idle for a while,
+                # its own queries are waited for until their deadline at most
+                now = time.time()
+                remaining = self.idle_timeout - (now - last_message)
+                if remaining <= 0 and not self.in_flight:
+                    break
+                if self.in_flight:
+                    deadline = min(self.in_flight.values()) + self.query_timeout - now
+                    remaining = min(remaining, deadline) if remaining > 0 else deadline
+
+                events = dict(self.poller.poll(timeout=max(1, math.ceil(remaining * 1000))))
+                if self.pull not in events:
+                    continue
+
+                self.receive_pending()
+                self.drain()
+                last_message = time.time()
+
+            self.logger.info("PeerNode_ks::event_loop - out of the event loop")
+        except Exception as e:
+            raise e
+
+    def expire_queries(self):
+        # a hop lost on the way (e.g. to a peer that is down) never comes back, so a query
+        # still in flight after query_timeout seconds counts as failed
+        now = time.time()
+        expired = [query_id for query_id, started in self.in_flight.items() if now - started > self.query_timeout]
+        for query_id in expired:
+            del self.in_flight[query_id]
+            self.counters["failed"] += 1
+            self.logger.warning(f"IncrementalSearch::expire_queries - query {query_id} {self.queries[query_id]} "
+                                f"got no answer in {self.query_timeout} seconds")
+        return len(expired)
+
+    def receive_pending(self):
+        while True:
+            try:
+                kind, bytes_rcvd = self.pull.recv_multipart(flags=zmq.NOBLOCK)
+            except zmq.ZMQError as e:
+                if e.errno == zmq.EAGAIN:
+                    break
+                raise e
+
+            if kind == self.TERMS:
+                self.handle_terms(bytes_rcvd)
+                continue
+            if kind == self.BLOOM:
+                self.handle_filters(bytes_rcvd)
+                continue
+
+            document_req = message_pb2.docReq()
+            document_req.ParseFromString(bytes_rcvd)
+            self.counters["messages_received"] += 1
+            self.counters["bytes_received"] += len(bytes_rcvd)
+            self.handle_document_hits(document_req)
+
+    def report(self):
+        if self.latencies:
+            latencies = np.array(self.latencies)
+            elapsed = max(1e-9, self.finish_time - self.start_time)
+            self.logger.info(f"IncrementalSearch::report - {len(latencies)} queries in {elapsed:.3f} seconds "
+                             f"({len(latencies) / elapsed:.1f} queries per second), latency mean "
+                             f"{latencies.mean() * 1000:.2f} ms, p95 {np.percentile(latencies, 95) * 1000:.2f} ms, "
+                             f"mean hits {np.mean([len(hits) for hits in self.results.values()]):.1f}")
+        if self.counters["failed"]:
+            self.logger.warning(f"IncrementalSearch::report - {self.counters['failed']} queries failed "
+                                f"without an answer in {self.query_timeout} seconds")
+        self.logger.info(f"IncrementalSearch::report - sent {self.counters['messages_sent']} messages "
+                         f"({self.counters['bytes_sent']} bytes), received {self.counters['messages_received']} "
+                         f"messages ({self.counters['bytes_received']} bytes)")
+        if self.counters["stale_hops"]:
+            self.logger.warning(f"IncrementalSearch::report - {self.counters['stale_hops']} hops carried other ranks, "
+                                f"{self.counters['restarted']} queries restarted after new ranks")
+        if self.cache.capacity:
+            self.logger.info(f"IncrementalSearch::report - cache hits {self.cache.counters['hits']}, "
+                             f"misses {self.cache.counters['misses']}, evictions {self.cache.counters['evictions']}, "
+                             f"expired {self.cache.counters['expired']}, invalidations {self.cache.counters['invalidations']}")
+        if self.bloom_fp:
+            self.logger.info(f"IncrementalSearch::report - Bloom filters pruned {self.counters['pruned']} candidates, "
+                             f"{self.counters['filter_bytes_sent']} filter bytes sent at startup")
 
     # def handle_update(self, update_req):
     #     try:
@@ -161,7 +519,10 @@ def parse():
                         default=1, help="What index subgraph is this?")
 
     parser.add_argument("-fo", "--folder", type=str,
-                        default="P2P_ks_results", help="Folder output")
+                        default="P2P_ks_results", help="Folder with the PageRank results of every peer, used to order the hits")
+
+    parser.add_argument("-k", "--top_k", type=int,
+                        default=10, help="Best ranked hits returned for every query (0 returns every hit)")
 
     parser.add_argument("-dd", "--doc_details", type=str,
                         default="corpus/document_details.json", help="Contains top 100 most common words from documents")
@@ -175,8 +536,35 @@ def parse():
     parser.add_argument("-pct", "--percent", type=int,
                         default="10", help="Percent of hits transferred to next peer")
 
+    parser.add_argument("-bf", "--bloom_fp", type=float,
+                        default=0.01, help="False positive rate of the posting list Bloom filters exchanged at startup (0 sends none)")
+
+    parser.add_argument("-cs", "--cache_size", type=int,
+                        default=1024, help="Query results kept for repeated queries (0 disables the cache)")
+
+    parser.add_argument("-ct", "--cache_ttl", type=float,
+                        default=300, help="Seconds a cached query result stays valid (0 keeps it until evicted)")
+
+    parser.add_argument("-w", "--window", type=int,
+                        default=16, help="Queries of this peer allowed in flight at once")
+
+    parser.add_argument("-to", "--idle_timeout", type=float,
+                        default=10, help="Seconds without any hop to serve before the peer stops")
+
+    parser.add_argument("-qt", "--query_timeout", type=float,
+                        default=10, help="Seconds a query of this peer may stay in flight before it counts as failed")
+
+    parser.add_argument("-st", "--startup_timeout", type=float,
+                        default=30, help="Seconds to wait for the posting list lengths and Bloom filters of every peer before querying")
+
     parser.add_argument("-f", "--file_name", type=str,
-                        default="graph.json", help="File name input for graph of a peer")
+                        default="corpus/graph_ks_docs.json", help="File name input for graph of a peer, with the documents of every page")
+
+    parser.add_argument("-wf", "--word_file", type=str,
+                        default="corpus/word_to_index.json", help="Word to word index mapping from generate_corpus.py")
+
+    parser.add_argument("-if", "--index_file", type=str,
+                        default="corpus/index_to_doc.json", help="Word index to documents mapping from generate_corpus.py")
     
     parser.add_argument("-sf", "--subgraph_file", type=str,
                         default="subgraph.json", help="Mapping of subgraph location to IP address")
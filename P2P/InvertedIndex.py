@@ -0,0 +1,110 @@
+import json
+import numpy as np
+
+# word id -> sorted doc ids, kept as one CSR array pair so every lookup is a slice,
+# with owns only the posting lists of the words owns(word_id) accepts are kept
+
+
+def normalize_word(word):
+    # every lookup of a query word goes through here, so the same word always maps the same way
+    return word.strip().lower()
+
+
+class InvertedIndex():
+    def __init__(self, word_file, index_file, graph_file, owns=None):
+        with open(word_file, "r") as f:
+            self.word_to_index = json.load(f)
+        with open(graph_file, "r") as f:
+            graph_list = json.load(f)
+        with open(index_file, "r") as f:
+            index_to_doc = json.load(f)
+
+        # documents get dense ids in the order their pages appear in the graph file
+        self.doc_names = []
+        self.doc_ids = {}
+        self.doc_page = []
+        for node in graph_list:
+            docs = node.get("doc", [])
+            for doc in docs if isinstance(docs, list) else [docs]:
+                self.doc_ids[doc] = len(self.doc_names)
+                self.doc_names.append(doc)
+                self.doc_page.append(str(node["name"]))
+
+        words_len = max(self.word_to_index.values(), default=-1) + 1
+        lengths = np.zeros(words_len, dtype=np.int64)
+        postings = [None] * words_len
+        for word_id, docs in index_to_doc.items():
+            for doc in docs:
+                # documents missing from the graph file are not on any peer
+                if doc not in self.doc_ids:
+                    self.doc_ids[doc] = len(self.doc_names)
+                    self.doc_names.append(doc)
+                    self.doc_page.append(None)
+            if owns is not None and not owns(int(word_id)):
+                # every peer numbers the documents of every word the same way, but keeps only its own lists
+                continue
+            ids = np.unique(np.fromiter((self.doc_ids[doc] for doc in docs), dtype=np.int32, count=len(docs)))
+            postings[int(word_id)] = ids
+            lengths[int(word_id)] = len(ids)
+
+        self.indptr = np.zeros(words_len + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        empty = np.zeros(0, dtype=np.int32)
+        self.indices = np.concatenate([empty] + [ids if ids is not None else empty for ids in postings])
+        # position of every document in the graph file, kept through every relabelling
+        self.doc_origin = np.arange(len(self.doc_names), dtype=np.int64)
+
+    def order_by_rank(self, page_ranks):
+        # relabel documents by descending PageRank of their page, so every sorted posting list
+        # is also in rank order and its first hits are the best ones, ties go by graph file
+        # position so the numbering depends on the ranks only
+        ranks = np.array([page_ranks.get(page, 0) if page is not None else 0 for page in self.doc_page],
+                         dtype=np.float64)
+        order = np.lexsort((self.doc_origin, -ranks))
+        new_ids = np.empty(len(order), dtype=np.int32)
+        new_ids[order] = np.arange(len(order), dtype=np.int32)
+
+        words = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+        indices = new_ids[self.indices]
+        self.indices = indices[np.lexsort((indices, words))]
+
+        self.doc_names = [self.doc_names[doc_id] for doc_id in order]
+        self.doc_ids = {name: doc_id for doc_id, name in enumerate(self.doc_names)}
+        self.doc_page = [self.doc_page[doc_id] for doc_id in order]
+        self.doc_origin = self.doc_origin[order]
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def word_id(self, word):
+        return self.word_to_index.get(normalize_word(word))
+
+    def postings(self, word_id):
+        if word_id is None or not 0 <= word_id < len(self):
+            return np.zeros(0, dtype=np.int32)
+        return self.indices[self.indptr[word_id]:self.indptr[word_id + 1]]
+
+    def threshold_search(self, candidates, word_id, limit):
+        # candidates arrive best first, and every one not scanned yet ranks below the hits found
+        # so far, so the scan stops as soon as limit of them are in this word's posting list
+        docs = self.postings(word_id)
+        if not len(docs):
+            return docs
+
+        found = []
+        found_len = 0
+        start = 0
+        chunk = max(16, limit)
+        while start < len(candidates) and found_len < limit:
+            block = candidates[start:start + chunk]
+            positions = np.minimum(np.searchsorted(docs, block), len(docs) - 1)
+            hits = block[docs[positions] == block]
+            found.append(hits)
+            found_len += len(hits)
+            start += chunk
+            chunk *= 2
+
+        return np.concatenate(found)[:limit] if found else docs[:0]
+
+    def names(self, doc_ids):
+        return [self.doc_names[doc_id] for doc_id in doc_ids]
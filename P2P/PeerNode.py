@@ -2,20 +2,39 @@ import json
 import argparse
 from collections import Counter
 import numpy as np
-from utils import PageNode, convert_to_page_subgraph, load_subgraph_file
+from utils import PageNode, convert_to_page_subgraph, convert_to_page_shard, load_subgraph_file
 import zmq
 from P2P import message_pb2
 import logging
 from collections import defaultdict
 import time
+import zlib
+import os
 
 class PeerNode():
+    # both control topics start with the prefix every peer subscribes to
+    CONTROL_TOPIC = b"ctl:"
+    HELLO_TOPIC = b"ctl:hello"
+    STATUS_TOPIC = b"ctl:status"
+
     def __init__(self, args, logger):
-        page_graph_list, self.total_docs = convert_to_page_subgraph(
-            args.file_name, args.subgraph)
+        if args.shard_folder:
+            page_graph_list, self.total_docs, node_ids = convert_to_page_shard(
+                f"{args.shard_folder}/{args.subgraph}.json")
+        else:
+            page_graph_list, self.total_docs = convert_to_page_subgraph(
+                args.file_name, args.subgraph)
+            node_ids = range(len(page_graph_list))
         self.document_graph = {}
         self.subgraph = args.subgraph
-        for node in page_graph_list:
+        # inward and outward links share these PageNode objects, so one write updates every link
+        self.node_index = {}
+        self.node_ids = {}
+        self.node_names = {}
+        for node_id, node in zip(node_ids, page_graph_list):
+            self.node_index[node.name] = node
+            self.node_ids[node.name] = node_id
+            self.node_names[node_id] = node.name
             if node.subgraph == self.subgraph:
                 self.document_graph[node.name] = node
         self.logger = logger
@@ -26,6 +45,36 @@ class PeerNode():
         self.iterations = args.iterations
         self.epsilon = args.epsilon
         self.folder = args.folder
+        self.idle_timeout = args.idle_timeout
+        self.wire_version = args.wire_version
+        self.wire_precision = args.wire_precision
+        self.compress_threshold = args.compress_threshold
+        self.batch_window = args.batch_window
+        self.batch_size = args.batch_size
+        self.pending_updates = {}
+        self.flush_deadline = None
+        self.inner_iterations = args.inner_iterations
+        self.ready_timeout = args.ready_timeout
+        self.hello_interval = args.hello_interval
+        self.peers = {int(subgraph_id) for subgraph_id in self.subgraph_info} - {self.subgraph}
+        self.heard_from = set()
+        self.acknowledged_by = set()
+        self.status_interval = args.status_interval
+        self.statuses = {}
+        self.status_round = 0
+        self.first_pass = None
+        self.peer_done = False
+        self.sent = 0
+        self.received = 0
+        self.local_residual = float("inf")
+        self.metrics_folder = args.metrics_folder
+        self.metrics = []
+        self.counters = Counter()
+        self.start_time = time.time()
+        self.ready_time = None
+        self.published = {}
+        if self.inner_iterations > 1:
+            self.build_local_block()
         self.push = None
         self.pull = None
 
@@ -47,36 +96,214 @@ class PeerNode():
             if int(subgraph_id) != self.subgraph:
                 self.logger.info(f"PeerNode::configure - connecting SUB to {self.subgraph_info[subgraph_id]}")
                 self.sub.connect("tcp://" + self.subgraph_info[subgraph_id])
-        self.sub.setsockopt(zmq.SUBSCRIBE, b"")
+        # only updates addressed to this subgraph are delivered, plus control messages for everyone
+        self.sub.setsockopt(zmq.SUBSCRIBE, self.topic(self.subgraph))
+        self.sub.setsockopt(zmq.SUBSCRIBE, self.CONTROL_TOPIC)
+        self.poller.register(self.sub, zmq.POLLIN)
 
         self.logger.info("PeerNode::configure completed")
 
     def driver(self):
         self.configure()
         self.print_document_graph()
-        time.sleep(10)
-        self.calculate_pagerank()
+        self.wait_until_ready()
+        if self.pending_updates:
+            self.flush_updates()
+        else:
+            self.recompute()
         self.event_loop()
 
+    def record(self, event, **fields):
+        # one JSON line per event, stamped with wall clock time so peers can be merged afterwards
+        if self.metrics_folder:
+            self.metrics.append({"time": time.time(), "peer": self.subgraph, "event": event, **fields})
+
+    def recompute(self, applied=0):
+        start = time.perf_counter()
+        self.calculate_pagerank()
+        elapsed = time.perf_counter() - start
+        self.counters["recomputes"] += 1
+        self.counters["recompute_seconds"] += elapsed
+        self.record("recompute", seconds=elapsed, applied=applied, residual=self.local_residual)
+
+    def wait_until_ready(self):
+        # PUB/SUB drops whatever is sent before the subscriber joins, so keep saying hello until
+        # this peer has heard every other peer and every other peer has heard this one
+        self.logger.info("PeerNode::wait_until_ready")
+        start = time.time()
+        while self.heard_from != self.peers or self.acknowledged_by != self.peers:
+            if time.time() - start > self.ready_timeout:
+                self.logger.warning(f"PeerNode::wait_until_ready - giving up after {self.ready_timeout} seconds, "
+                                    f"heard from {sorted(self.heard_from)}, acknowledged by {sorted(self.acknowledged_by)}")
+                break
+
+            self.send_hello(False)
+            events = dict(self.poller.poll(timeout=int(self.hello_interval * 1000)))
+            if self.sub in events:
+                # updates from peers that are already running are kept for the first recompute
+                self.buffer_updates(self.receive_pending())
+
+        # the last hello lists every peer, the ones still waiting take it as their acknowledgement
+        self.send_hello(True)
+        self.ready_time = time.time()
+        self.record("ready", seconds=self.ready_time - start, heard_from=sorted(self.heard_from))
+        self.logger.info(f"PeerNode::wait_until_ready - ready after {self.ready_time - start:.2f} seconds")
+
+    def send_hello(self, ready):
+        hello_req = message_pb2.helloReq()
+        hello_req.subgraph_id = self.subgraph
+        hello_req.heard_from[:] = sorted(self.heard_from)
+        hello_req.ready = ready
+        try:
+            self.pub.send_multipart([self.HELLO_TOPIC, hello_req.SerializeToString()])
+        except zmq.ZMQError as e:
+            self.logger.info(e)
+
+    def send_status(self, done=False):
+        self.status_round += 1
+        status_req = message_pb2.statusReq()
+        status_req.subgraph_id = self.subgraph
+        status_req.round = self.status_round
+        status_req.residual = self.local_residual
+        status_req.sent = self.sent
+        status_req.received = self.received
+        status_req.pending = len(self.pending_updates)
+        status_req.done = done
+        # PUB does not deliver to itself, so this peer's own status goes straight into the table
+        self.statuses[self.subgraph] = status_req
+        try:
+            self.pub.send_multipart([self.STATUS_TOPIC, status_req.SerializeToString()])
+        except zmq.ZMQError as e:
+            self.logger.info(e)
+
+    def handle_control(self, topic, bytes_rcvd):
+        if topic == self.STATUS_TOPIC:
+            status_req = message_pb2.statusReq()
+            status_req.ParseFromString(bytes_rcvd)
+            self.statuses[status_req.subgraph_id] = status_req
+            if status_req.done:
+                self.peer_done = True
+            return
+
+        hello_req = message_pb2.helloReq()
+        hello_req.ParseFromString(bytes_rcvd)
+        self.heard_from.add(hello_req.subgraph_id)
+        if hello_req.ready or self.subgraph in hello_req.heard_from:
+            self.acknowledged_by.add(hello_req.subgraph_id)
+
+    def globally_converged(self):
+        if set(self.statuses) != self.peers | {self.subgraph}:
+            return False
+        statuses = self.statuses.values()
+        if any(status.residual > self.epsilon or status.pending for status in statuses):
+            return False
+        # every update that was sent has been received, so none is still in flight
+        return sum(status.sent for status in statuses) == sum(status.received for status in statuses)
+
+    def check_termination(self):
+        if self.peer_done:
+            return True
+        if not self.globally_converged():
+            self.first_pass = None
+            return False
+
+        # the counters must match on a later status from every peer, otherwise an update
+        # sent between two reports could still be on its way
+        counts = {subgraph: (status.sent, status.received) for subgraph, status in self.statuses.items()}
+        rounds = {subgraph: status.round for subgraph, status in self.statuses.items()}
+        if self.first_pass is None or self.first_pass[0] != counts:
+            self.first_pass = (counts, rounds)
+            return False
+        return all(rounds[subgraph] > self.first_pass[1][subgraph] for subgraph in rounds)
+
+    def build_local_block(self):
+        # local documents take the first slots, remote pages linking into them follow as ghosts
+        self.slot_names = list(self.document_graph)
+        slots = {name: slot for slot, name in enumerate(self.slot_names)}
+        block_targets = []
+        block_sources = []
+        for target, name in enumerate(self.document_graph):
+            for in_node in self.document_graph[name].inward_nodes:
+                if in_node.name not in slots:
+                    slots[in_node.name] = len(self.slot_names)
+                    self.slot_names.append(in_node.name)
+                block_targets.append(target)
+                block_sources.append(slots[in_node.name])
+
+        self.block_targets = np.array(block_targets, dtype=np.int64)
+        self.block_sources = np.array(block_sources, dtype=np.int64)
+        self.block_inverse_out_degree = np.array(
+            [1 / max(1, self.node_index[name].out_degree) for name in self.slot_names])
+        self.block_destinations = [
+            sorted({out_node.subgraph for out_node in self.document_graph[name].outward_nodes
+                    if out_node.subgraph != self.subgraph})
+            for name in self.document_graph]
+
+    def calculate_block_pagerank(self):
+        self.logger.debug("PeerNode::calculate_block_pagerank")
+        local_len = len(self.document_graph)
+        ranks = np.array([self.node_index[name].page_rank for name in self.slot_names], dtype=np.float64)
+        start_ranks = ranks[:local_len].copy()
+        random_walk = (1 - self.damping) / self.total_docs
+
+        # Jacobi sweeps over the local block with the ghost ranks held fixed
+        for _ in range(self.inner_iterations):
+            pulled = np.bincount(self.block_targets,
+                                 weights=ranks[self.block_sources] * self.block_inverse_out_degree[self.block_sources],
+                                 minlength=local_len)
+            local_ranks = random_walk + self.damping * pulled
+            rel_error = np.abs(local_ranks - ranks[:local_len]) / local_ranks
+            ranks[:local_len] = local_ranks
+            if not len(rel_error) or rel_error.max() <= self.epsilon:
+                break
+
+        change = np.abs(ranks[:local_len] - start_ranks) / ranks[:local_len]
+        self.local_residual = float(change.max()) if len(change) else 0.0
+
+        # only boundary ranks that moved since they were last published are sent
+        outward_messages_to_send = defaultdict(dict)
+        for slot, name in enumerate(self.slot_names[:local_len]):
+            new_page_rank = float(ranks[slot])
+            self.update_page_graph(name, new_page_rank)
+            if not self.block_destinations[slot]:
+                continue
+            published = self.published.get(name)
+            if published is not None and abs(published - new_page_rank) / new_page_rank <= self.epsilon:
+                continue
+            self.published[name] = new_page_rank
+            for destination in self.block_destinations[slot]:
+                outward_messages_to_send[destination][name] = new_page_rank
+
+        for destination, messages in outward_messages_to_send.items():
+            new_pagerank_id, new_pagerank_values = zip(*messages.items())
+            self.send_pagerank_message(destination, new_pagerank_id, new_pagerank_values)
+
     def calculate_pagerank(self):
+        if self.inner_iterations > 1:
+            self.calculate_block_pagerank()
+            return
+
         self.logger.debug("PeerNode::calculate_pagerank")
 
-        outward_messages_to_send = {}
+        # updates grouped by the subgraph that owns the target of each outward link
+        outward_messages_to_send = defaultdict(dict)
+        self.local_residual = 0.0
         
         for document, node in self.document_graph.items():
             page_rank_sum = 0
             for in_node in node.inward_nodes:
-                out_degree = max(1, len(in_node.outward_nodes))
+                out_degree = max(1, in_node.out_degree)
                 page_rank_sum += (in_node.page_rank / out_degree)
 
             random_walk = (1 - self.damping) / self.total_docs
             new_page_rank = random_walk + self.damping * page_rank_sum
             rel_error = abs(node.page_rank - new_page_rank) / new_page_rank
+            self.local_residual = max(self.local_residual, rel_error)
             self.document_graph[document].page_rank = new_page_rank
 
             for out_node in node.outward_nodes:
                 if out_node.subgraph != self.subgraph and rel_error > self.epsilon:
-                    outward_messages_to_send[node.name] = new_page_rank
+                    outward_messages_to_send[out_node.subgraph][node.name] = new_page_rank
 
             self.update_page_graph(node.name, new_page_rank)
 
@@ -84,40 +311,81 @@ class PeerNode():
             self.logger.debug("No changes to pagerank.")
             return
         
-        new_pagerank_id, new_pagerank_values = zip(*outward_messages_to_send.items())
-        
-        self.send_pagerank_message(new_pagerank_id, new_pagerank_values)
+        for destination, messages in outward_messages_to_send.items():
+            new_pagerank_id, new_pagerank_values = zip(*messages.items())
+            self.send_pagerank_message(destination, new_pagerank_id, new_pagerank_values)
             
-    def send_pagerank_message(self, new_pagerank_id, new_pagerank_values):
-        self.logger.debug(f"PeerNode::send_pagerank_message updating {new_pagerank_id} with {new_pagerank_values}")
+    def topic(self, subgraph):
+        # the separator keeps subgraph 1 from matching the prefix of subgraph 10
+        return f"{subgraph}:".encode()
 
-        new_pagerank_id = [str(x) for x in new_pagerank_id]
-        new_pagerank_values = [str(x) for x in new_pagerank_values]
+    def send_pagerank_message(self, destination, new_pagerank_id, new_pagerank_values):
+        self.logger.debug(f"PeerNode::send_pagerank_message - {len(new_pagerank_id)} ranks for subgraph {destination}")
 
-        update_req = message_pb2.updateReq()
-        update_req.id_to_update[:] = new_pagerank_id
-        update_req.pagerank_to_update[:] = new_pagerank_values
+        update_req = self.encode_update(new_pagerank_id, new_pagerank_values)
 
         buf2send = update_req.SerializeToString()
-        self.logger.debug(buf2send)
         try:
-            self.pub.send(buf2send)
+            self.pub.send_multipart([self.topic(destination), buf2send])
+            self.sent += 1
+            self.counters["bytes_sent"] += len(buf2send)
+            self.record("send", destination=destination, ranks=len(new_pagerank_id), bytes=len(buf2send))
         except zmq.ZMQError as e:
             self.logger.info(e)
 
 
-    def update_page_graph(self, node_to_update, new_page_rank):
-        self.logger.debug(f"PeerNode::update_page_graph - updating {node_to_update}, and all its inward links, with {new_page_rank}")
-        
-        for document in self.document_graph:
-            for in_node in self.document_graph[document].inward_nodes:
-                if in_node.name == node_to_update:
-                    in_node.page_rank = new_page_rank
-                    self.logger.debug(f"Updated {in_node.name} at Node {document} with {in_node.page_rank}")
+    def encode_update(self, new_pagerank_id, new_pagerank_values):
+        update_req = message_pb2.updateReq()
+        update_req.subgraph_id = self.subgraph
+
+        if self.wire_version < 2:
+            update_req.version = 1
+            update_req.id_to_update[:] = [str(x) for x in new_pagerank_id]
+            update_req.pagerank_to_update[:] = [str(x) for x in new_pagerank_values]
+            return update_req
+
+        # sorted graph indices sent as gaps stay small varints, ranks go as packed floats
+        indices = np.array([self.node_ids[x] for x in new_pagerank_id], dtype=np.int64)
+        order = np.argsort(indices)
+        indices = indices[order]
+        values = np.asarray(new_pagerank_values, dtype=np.float64)[order]
+
+        update_req.version = 2
+        update_req.delta_encoded = True
+        update_req.node_index[:] = np.diff(indices, prepend=0).tolist()
+        if self.wire_precision == 32:
+            update_req.pagerank_f32[:] = values.tolist()
+        else:
+            update_req.pagerank[:] = values.tolist()
+
+        if self.compress_threshold and len(indices) >= self.compress_threshold:
+            compressed_req = message_pb2.updateReq()
+            compressed_req.version = 2
+            compressed_req.subgraph_id = self.subgraph
+            compressed_req.compressed = zlib.compress(update_req.SerializeToString())
+            return compressed_req
+
+        return update_req
+
+    def decode_update(self, update_req):
+        if update_req.compressed:
+            inner_req = message_pb2.updateReq()
+            inner_req.ParseFromString(zlib.decompress(update_req.compressed))
+            update_req = inner_req
+
+        if update_req.version < 2:
+            return list(update_req.id_to_update), [float(x) for x in update_req.pagerank_to_update]
+
+        indices = np.fromiter(update_req.node_index, dtype=np.int64, count=len(update_req.node_index))
+        if update_req.delta_encoded:
+            indices = np.cumsum(indices)
+        values = update_req.pagerank if len(update_req.pagerank) else update_req.pagerank_f32
+        return [self.node_names.get(x) for x in indices.tolist()], list(values)
 
-            for out_node in self.document_graph[document].outward_nodes:
-                if out_node.name == node_to_update:
-                    out_node.page_rank = new_page_rank
+    def update_page_graph(self, node_to_update, new_page_rank):
+        node = self.node_index.get(node_to_update)
+        if node is not None:
+            node.page_rank = new_page_rank
 
     def print_document_graph(self):
         for document, node in self.document_graph.items():
@@ -128,42 +396,138 @@ class PeerNode():
         try:
             self.logger.info("PeerNode::event_loop - run the event loop")
             iters = 0
-            no_message = 0
+            last_message = time.time()
+            next_status = time.time()
+            stop_reason = "iterations"
             while True:
-                try:
-                    bytes_rcvd = self.sub.recv(flags=zmq.NOBLOCK)
-                    update_req = message_pb2.updateReq()
-                    update_req.ParseFromString(bytes_rcvd)
-                    self.handle_update(update_req)
-                    if self.iterations == iters:
+                now = time.time()
+                remaining = self.idle_timeout - (now - last_message)
+                if remaining <= 0 and not self.pending_updates:
+                    self.logger.info("PeerNode::event_loop - no message before the idle timeout")
+                    stop_reason = "idle_timeout"
+                    break
+
+                if now >= next_status:
+                    # with nothing left to apply, a peer whose last sweep still moved its ranks
+                    # sweeps again on its own rather than waiting for input that may never come
+                    if not self.pending_updates and self.local_residual > self.epsilon:
+                        self.recompute()
+                    self.send_status()
+                    next_status = now + self.status_interval
+                    if self.check_termination():
+                        self.logger.info("PeerNode::event_loop - every peer converged and no update is in flight")
+                        stop_reason = "converged"
                         break
-                    iters += 1
-                except zmq.ZMQError as e:
-                    if e.errno == zmq.EAGAIN:
-                        self.logger.debug("No message yet...")
-                        time.sleep(1)
-                        no_message += 1
-                        if no_message == 50:
-                            break
-
-             
+
+                timeout = min(remaining, next_status - now)
+                if self.flush_deadline is not None:
+                    timeout = min(timeout, self.flush_deadline - now)
+
+                events = dict(self.poller.poll(timeout=max(0, int(timeout * 1000))))
+                if self.sub in events:
+                    update_reqs = self.receive_pending()
+                    if update_reqs:
+                        last_message = time.time()
+                    self.buffer_updates(update_reqs)
+                    iters += len(update_reqs)
+
+                if self.pending_updates and (len(self.pending_updates) >= self.batch_size
+                                             or time.time() >= self.flush_deadline):
+                    self.flush_updates()
+
+                if iters >= self.iterations:
+                    if self.pending_updates:
+                        self.flush_updates()
+                    break
+
+                if self.peer_done:
+                    self.logger.info("PeerNode::event_loop - another peer detected global convergence")
+                    stop_reason = "converged"
+                    break
+
+            # the last status lets the other peers stop without waiting for their own check,
+            # a peer stopped by its own limits must not stop the rest
+            self.send_status(done=stop_reason == "converged")
+            self.summarize(stop_reason)
             self.logger.info("PeerNode::event_loop - out of the event loop")
         except Exception as e:
             raise e
 
-    def handle_update(self, update_req):
-        try:
-            self.logger.debug(f"PeerNode::handle_update")
-            self.logger.debug(update_req)
-
-            for node_id, new_rank in zip(update_req.id_to_update, [float(x) for x in update_req.pagerank_to_update]):
-                self.update_page_graph(node_id, new_rank)
+    def receive_pending(self):
+        # drain everything that already arrived so one recompute covers all of it
+        update_reqs = []
+        received_bytes = 0
+        parse_seconds = 0
+        while True:
+            try:
+                topic, bytes_rcvd = self.sub.recv_multipart(flags=zmq.NOBLOCK)
+            except zmq.ZMQError as e:
+                if e.errno == zmq.EAGAIN:
+                    break
+                raise e
+
+            if topic.startswith(self.CONTROL_TOPIC):
+                self.handle_control(topic, bytes_rcvd)
+                continue
+
+            start = time.perf_counter()
+            update_req = message_pb2.updateReq()
+            update_req.ParseFromString(bytes_rcvd)
+            parse_seconds += time.perf_counter() - start
+            update_reqs.append(update_req)
+            self.received += 1
+            received_bytes += len(bytes_rcvd)
+
+        if update_reqs:
+            self.counters["bytes_received"] += received_bytes
+            self.counters["parse_seconds"] += parse_seconds
+            self.record("receive", messages=len(update_reqs), bytes=received_bytes, seconds=parse_seconds)
+        self.logger.debug(f"PeerNode::receive_pending - received {len(update_reqs)} messages")
+        return update_reqs
+
+    def buffer_updates(self, update_reqs):
+        # only the latest rank of every page is kept until the next flush
+        start = time.perf_counter()
+        for update_req in update_reqs:
+            for node_id, new_rank in zip(*self.decode_update(update_req)):
+                self.pending_updates[node_id] = new_rank
+        self.counters["parse_seconds"] += time.perf_counter() - start
+
+        if self.pending_updates and self.flush_deadline is None:
+            self.flush_deadline = time.time() + self.batch_window
+
+    def flush_updates(self):
+        self.logger.debug(f"PeerNode::flush_updates - applying {len(self.pending_updates)} ranks")
+
+        applied = len(self.pending_updates)
+        for node_id, new_rank in self.pending_updates.items():
+            self.update_page_graph(node_id, new_rank)
+        self.pending_updates = {}
+        self.flush_deadline = None
+
+        self.recompute(applied)
+
+    def summarize(self, stop_reason):
+        ready_time = self.ready_time or self.start_time
+        self.record("done", reason=stop_reason, messages_sent=self.sent, messages_received=self.received,
+                    bytes_sent=self.counters["bytes_sent"], bytes_received=self.counters["bytes_received"],
+                    parse_seconds=self.counters["parse_seconds"], recompute_seconds=self.counters["recompute_seconds"],
+                    recomputes=self.counters["recomputes"], residual=self.local_residual,
+                    startup_seconds=ready_time - self.start_time, run_seconds=time.time() - ready_time)
+        self.logger.info(f"PeerNode::summarize - stopped on {stop_reason} after {time.time() - ready_time:.2f} seconds, "
+                         f"sent {self.sent} messages ({self.counters['bytes_sent']} bytes), "
+                         f"received {self.received} messages ({self.counters['bytes_received']} bytes), "
+                         f"{self.counters['recomputes']} recomputes in {self.counters['recompute_seconds']:.3f} seconds")
+
+    def export_metrics(self):
+        if not self.metrics_folder:
+            return
 
-            self.calculate_pagerank()
+        os.makedirs(self.metrics_folder, exist_ok=True)
+        with open(f"{self.metrics_folder}/{self.subgraph}.jsonl", "w") as f:
+            for metric in self.metrics:
+                f.write(json.dumps(metric) + "\n")
 
-        except Exception as e:
-            raise e
-        
     def output(self):
         self.logger.info("PeerNode::output")
         result = {}
@@ -188,9 +552,45 @@ def parse():
     parser.add_argument("-it", "--iterations", type=int,
                         default=1000, help="Number of pagerank iterations to run")
 
+    parser.add_argument("-wv", "--wire_version", type=int, default=2, choices=[1, 2],
+                        help="Update message format to send: 1 for string fields, 2 for graph indices and packed ranks")
+
+    parser.add_argument("-wp", "--wire_precision", type=int, default=64, choices=[32, 64],
+                        help="Float width of the packed ranks in wire version 2")
+
+    parser.add_argument("-ct", "--compress_threshold", type=int, default=256,
+                        help="zlib compress version 2 batches with at least this many ranks (0 never compresses)")
+
+    parser.add_argument("-ii", "--inner_iterations", type=int, default=1,
+                        help="Maximum local sweeps before publishing boundary ranks (1 keeps the single in-place sweep)")
+
+    parser.add_argument("-bw", "--batch_window", type=float, default=0,
+                        help="Seconds to keep collecting received ranks before recomputing (0 recomputes once per drained batch)")
+
+    parser.add_argument("-bsz", "--batch_size", type=int, default=1000,
+                        help="Recompute early once this many distinct ranks are waiting")
+
+    parser.add_argument("-rt", "--ready_timeout", type=float, default=60,
+                        help="Seconds to wait for every peer in the subgraph file before starting anyway")
+
+    parser.add_argument("-hi", "--hello_interval", type=float, default=0.2,
+                        help="Seconds between hello messages while waiting for the other peers")
+
+    parser.add_argument("-si", "--status_interval", type=float, default=0.5,
+                        help="Seconds between status broadcasts used to detect that every peer converged")
+
+    parser.add_argument("-to", "--idle_timeout", type=float,
+                        default=50, help="Seconds without any message before the peer stops")
+
     parser.add_argument("-f", "--file_name", type=str,
                         default="graph.json", help="File name input for graph of a peer")
+
+    parser.add_argument("-mf", "--metrics_folder", type=str,
+                        default=None, help="Optional folder to write <subgraph>.jsonl with one line per send, receive and recompute")
     
+    parser.add_argument("-sh", "--shard_folder", type=str,
+                        default=None, help="Folder from shardGraph.py, load only this subgraph's shard instead of the whole graph")
+
     parser.add_argument("-sf", "--subgraph_file", type=str,
                         default="subgraph.json", help="Mapping of subgraph location to IP address")
     
@@ -223,6 +623,7 @@ def main():
         solver = PeerNode(args, logger)
         solver.driver()
         solver.output()
+        solver.export_metrics()
 
     except Exception as e:
         print("Exception caught in main - {}".format(e))
@@ -0,0 +1,51 @@
+import time
+from collections import OrderedDict, Counter
+from P2P.InvertedIndex import normalize_word
+
+# results of finished queries keyed by their normalized words, least recently used first,
+# dropped when they get older than the ttl or when new ranks renumber the documents
+
+
+class QueryCache():
+    def __init__(self, capacity, ttl):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.counters = Counter()
+
+    @staticmethod
+    def key(words):
+        return tuple(sorted({normalize_word(word) for word in words}))
+
+    def clear(self):
+        # cached hits are doc ids of the old numbering
+        self.counters["invalidations"] += 1
+        self.entries.clear()
+
+    def get(self, key):
+        if not self.capacity:
+            return None
+
+        entry = self.entries.get(key)
+        if entry is not None and self.ttl and time.time() - entry[0] > self.ttl:
+            del self.entries[key]
+            self.counters["expired"] += 1
+            entry = None
+
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return entry[1]
+
+    def put(self, key, value):
+        if not self.capacity:
+            return
+
+        self.entries[key] = (time.time(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
@@ -13,17 +13,25 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmessage.proto\"R\n\tupdateReq\x12\x14\n\x0cid_to_update\x18\x01 \x03(\t\x12\x1a\n\x12pagerank_to_update\x18\x02 \x03(\t\x12\x13\n\x0bsubgraph_id\x18\x03 \x01(\r\"\x0c\n\nupdateResp\"0\n\x06\x64ocReq\x12\x11\n\tdocuments\x18\x01 \x03(\t\x12\x13\n\x0bsubgraph_id\x18\x02 \x01(\rb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmessage.proto\"\xca\x01\n\tupdateReq\x12\x14\n\x0cid_to_update\x18\x01 \x03(\t\x12\x1a\n\x12pagerank_to_update\x18\x02 \x03(\t\x12\x13\n\x0bsubgraph_id\x18\x03 \x01(\r\x12\x0f\n\x07version\x18\x04 \x01(\r\x12\x12\n\nnode_index\x18\x05 \x03(\r\x12\x10\n\x08pagerank\x18\x06 \x03(\x01\x12\x14\n\x0cpagerank_f32\x18\x07 \x03(\x02\x12\x15\n\rdelta_encoded\x18\x08 \x01(\x08\x12\x12\n\ncompressed\x18\t \x01(\x0c\"\x0c\n\nupdateResp\"\xa5\x01\n\x06\x64ocReq\x12\x11\n\tdocuments\x18\x01 \x03(\t\x12\x13\n\x0bsubgraph_id\x18\x02 \x01(\r\x12\x10\n\x08query_id\x18\x03 \x01(\x04\x12\x0e\n\x06origin\x18\x04 \x01(\r\x12\r\n\x05terms\x18\x05 \x03(\r\x12\x0f\n\x07\x64oc_ids\x18\x06 \x03(\r\x12\x0c\n\x04hops\x18\x07 \x01(\r\x12\x0c\n\x04\x64one\x18\x08 \x01(\x08\x12\x15\n\rranks_version\x18\t \x01(\r\"B\n\x08helloReq\x12\x13\n\x0bsubgraph_id\x18\x01 \x01(\r\x12\x12\n\nheard_from\x18\x02 \x03(\r\x12\r\n\x05ready\x18\x03 \x01(\x08\"\x80\x01\n\tstatusReq\x12\x13\n\x0bsubgraph_id\x18\x01 \x01(\r\x12\r\n\x05round\x18\x02 \x01(\r\x12\x10\n\x08residual\x18\x03 \x01(\x01\x12\x0c\n\x04sent\x18\x04 \x01(\x04\x12\x10\n\x08received\x18\x05 \x01(\x04\x12\x0f\n\x07pending\x18\x06 \x01(\r\x12\x0c\n\x04\x64one\x18\x07 \x01(\x08\"B\n\x08termsReq\x12\x13\n\x0bsubgraph_id\x18\x01 \x01(\r\x12\x10\n\x08word_ids\x18\x02 \x03(\r\x12\x0f\n\x07lengths\x18\x03 \x03(\r\"w\n\x08\x62loomReq\x12\x13\n\x0bsubgraph_id\x18\x01 \x01(\r\x12\x10\n\x08word_ids\x18\x02 \x03(\r\x12\x0c\n\x04\x62its\x18\x03 \x03(\r\x12\x0e\n\x06hashes\x18\x04 \x03(\r\x12\x0f\n\x07\x66ilters\x18\x05 \x03(\x0c\x12\x15\n\rranks_version\x18\x06 \x01(\rb\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'message_pb2', globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
-  _UPDATEREQ._serialized_start=17
-  _UPDATEREQ._serialized_end=99
-  _UPDATERESP._serialized_start=101
-  _UPDATERESP._serialized_end=113
-  _DOCREQ._serialized_start=115
-  _DOCREQ._serialized_end=163
+  _UPDATEREQ._serialized_start=18
+  _UPDATEREQ._serialized_end=220
+  _UPDATERESP._serialized_start=222
+  _UPDATERESP._serialized_end=234
+  _DOCREQ._serialized_start=237
+  _DOCREQ._serialized_end=402
+  _HELLOREQ._serialized_start=404
+  _HELLOREQ._serialized_end=470
+  _STATUSREQ._serialized_start=473
+  _STATUSREQ._serialized_end=601
+  _TERMSREQ._serialized_start=603
+  _TERMSREQ._serialized_end=669
+  _BLOOMREQ._serialized_start=671
+  _BLOOMREQ._serialized_end=790
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,114 @@
+import json
+import os
+import argparse
+from collections import defaultdict
+
+# merges the <subgraph>.jsonl files written by PeerNode -mf into one timeline,
+# then shows where every peer spent its run and which peer finished last
+
+
+def load_metrics(metrics_folder):
+    metrics = []
+    for file in sorted(os.listdir(metrics_folder)):
+        if file.endswith(".jsonl"):
+            with open(f"{metrics_folder}/{file}", "r") as f:
+                metrics.extend(json.loads(line) for line in f if line.strip())
+
+    metrics.sort(key=lambda metric: metric["time"])
+    return metrics
+
+
+def summarize(metrics):
+    summaries = {}
+    for metric in metrics:
+        if metric["event"] == "done":
+            summaries[metric["peer"]] = metric
+
+    print(f"{'peer':>5} {'reason':>12} {'sent':>6} {'recv':>6} {'KB sent':>9} {'KB recv':>9} "
+          f"{'startup':>8} {'run':>7} {'recompute':>10} {'parse':>7} {'waiting':>8} {'residual':>10}")
+    for peer, summary in sorted(summaries.items()):
+        run_seconds = max(summary["run_seconds"], 1e-9)
+        waiting = run_seconds - summary["recompute_seconds"] - summary["parse_seconds"]
+        print(f"{peer:>5} {summary['reason']:>12} {summary['messages_sent']:>6} {summary['messages_received']:>6} "
+              f"{summary['bytes_sent'] / 1024:>9.1f} {summary['bytes_received'] / 1024:>9.1f} "
+              f"{summary['startup_seconds']:>7.2f}s {run_seconds:>6.2f}s "
+              f"{summary['recompute_seconds'] / run_seconds:>10.1%} {summary['parse_seconds'] / run_seconds:>7.1%} "
+              f"{waiting / run_seconds:>8.1%} {summary['residual']:>10.2e}")
+
+    if not summaries:
+        return
+
+    # the last peer to stop sets the length of the run
+    straggler = max(summaries.values(), key=lambda summary: summary["time"])
+    first = min(summary["time"] for summary in summaries.values())
+    print(f"\nLast peer to stop: {straggler['peer']} ({straggler['time'] - first:.2f} seconds after the first)")
+
+    phases = {
+        "recompute": sum(summary["recompute_seconds"] for summary in summaries.values()),
+        "parse": sum(summary["parse_seconds"] for summary in summaries.values()),
+    }
+    phases["waiting"] = sum(summary["run_seconds"] for summary in summaries.values()) - sum(phases.values())
+    total = max(sum(phases.values()), 1e-9)
+    print("Time across all peers: " + ", ".join(
+        f"{phase} {seconds:.2f}s ({seconds / total:.1%})" for phase, seconds in phases.items()))
+
+
+def timeline(metrics, bucket):
+    if not metrics:
+        return
+
+    start = metrics[0]["time"]
+    peers = sorted({metric["peer"] for metric in metrics})
+    rows = defaultdict(lambda: defaultdict(lambda: {"sent": 0, "received": 0, "residual": None}))
+    for metric in metrics:
+        cell = rows[int((metric["time"] - start) / bucket)][metric["peer"]]
+        if metric["event"] == "send":
+            cell["sent"] += 1
+        elif metric["event"] == "receive":
+            cell["received"] += metric["messages"]
+        elif metric["event"] == "recompute":
+            cell["residual"] = metric["residual"]
+
+    # every cell shows messages sent/received and the residual of the last recompute in the bucket
+    print("\n" + f"{'time':>7} " + " ".join(f"{'peer ' + str(peer):>22}" for peer in peers))
+    for row in range(max(rows) + 1):
+        cells = []
+        for peer in peers:
+            cell = rows[row][peer]
+            residual = f"{cell['residual']:.1e}" if cell["residual"] is not None else "-"
+            cells.append(f"{cell['sent']:>5}/{cell['received']:<5} {residual:>10}")
+        print(f"{row * bucket:>6.2f}s " + " ".join(f"{cell:>22}" for cell in cells))
+
+
+def parse():
+    # instantiate a ArgumentParser object
+    parser = argparse.ArgumentParser(description="Merge PeerNode metrics into one timeline")
+
+    parser.add_argument("-mf", "--metrics_folder", type=str,
+                        default="P2P_metrics", help="Folder with the <subgraph>.jsonl files of every peer")
+
+    parser.add_argument("-b", "--bucket", type=float,
+                        default=0.5, help="Seconds per timeline row")
+
+    parser.add_argument("-o", "--out_file_name", type=str,
+                        default=None, help="Optional output file for the merged events as JSON lines")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+
+    metrics = load_metrics(args.metrics_folder)
+    summarize(metrics)
+    timeline(metrics, args.bucket)
+
+    if args.out_file_name:
+        with open(args.out_file_name, "w") as f:
+            for metric in metrics:
+                f.write(json.dumps(metric) + "\n")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -9,6 +9,8 @@ import argparse
 import random
 import json
 import random
+import numpy as np
+from utils import CSRGraph, save_csr, export_csr_json, links_to_csr
 
 
 class Node:
@@ -25,6 +27,8 @@ class InternetGraph ():
         self.node_list = []
         self.node_count = 0
         self.json_file = ""
+        self.binary_folder = None
+        self.mode = "simple"
 
     def configure(self, args):
         self.logger.debug("InternetGraph::configure")
@@ -32,6 +36,8 @@ class InternetGraph ():
         self.node_count = args.number
         self.json_file = args.file_name
         self.subgraph = args.subgraph
+        self.binary_folder = args.binary_folder
+        self.mode = args.mode
 
     def generate(self, in_deg, out_deg):
         for i in range(self.node_count):
@@ -88,6 +94,86 @@ class InternetGraph ():
         with open(self.json_file, "w") as f:
             json.dump(final_graph, f, indent=4)
 
+        if self.binary_folder:
+            self.export_binary(final_graph)
+
+    def export_binary(self, final_graph):
+        self.logger.debug(f"InternetGraph::export_binary - writing {self.binary_folder}")
+        name_to_index = {}
+        for index, node in enumerate(self.node_list):
+            name_to_index[node.name] = index
+
+        in_indptr = np.zeros(len(final_graph) + 1, dtype=np.int64)
+        out_indptr = np.zeros(len(final_graph) + 1, dtype=np.int64)
+        in_indices = []
+        out_indices = []
+        for index, entry in enumerate(final_graph):
+            in_indices.extend(name_to_index[name] for name in entry["inward_links"])
+            out_indices.extend(name_to_index[name] for name in entry["outward_links"])
+            in_indptr[index + 1] = len(in_indices)
+            out_indptr[index + 1] = len(out_indices)
+
+        csr_graph = CSRGraph(np.array([entry["name"] for entry in final_graph]),
+                             np.array([entry["subgraph"] for entry in final_graph], dtype=np.int32),
+                             in_indptr, np.array(in_indices, dtype=np.int64),
+                             out_indptr, np.array(out_indices, dtype=np.int64))
+        save_csr(csr_graph, self.binary_folder)
+
+    def degree_cdf(self, deg):
+        # same power law as generate, built once as a cumulative table
+        weights = np.zeros(self.node_count)
+        weights[2:] = 1 / np.arange(2, self.node_count, dtype=np.float64) ** deg
+        weights[0] = (1 - weights.sum()) * 0.25
+        weights[1] = 1 - weights.sum()
+        self.logger.debug(
+            f"This is weight distribution total {weights.sum()} it should equal 1")
+        return np.cumsum(weights)
+
+    def sample_degrees(self, rng, deg):
+        cdf = self.degree_cdf(deg)
+        degrees = np.searchsorted(cdf, rng.random(self.node_count) * cdf[-1], side="right")
+        return np.minimum(degrees, self.node_count - 1)
+
+    def link_degree(self, keys, inward):
+        ends = keys % self.node_count if inward else keys // self.node_count
+        return np.bincount(ends, minlength=self.node_count)
+
+    def add_links(self, rng, keys, missing, inward):
+        # link every node to as many random partners as it is missing, duplicate
+        # and self links collapse in the key set and are retried in the next round
+        wanted = self.link_degree(keys, inward) + missing
+        for _ in range(10):
+            if not missing.any():
+                break
+            nodes = np.repeat(np.arange(self.node_count, dtype=np.int64), missing)
+            partners = rng.integers(0, self.node_count, size=len(nodes), dtype=np.int64)
+            sources, targets = (partners, nodes) if inward else (nodes, partners)
+            new_keys = sources * self.node_count + targets
+            keys = np.sort(np.concatenate([keys, new_keys[sources != targets]]), kind="stable")
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            missing = np.maximum(wanted - self.link_degree(keys, inward), 0)
+        return keys
+
+    def generate_vectorized(self, in_deg, out_deg):
+        rng = np.random.default_rng()
+        in_counts = self.sample_degrees(rng, in_deg)
+        out_counts = self.sample_degrees(rng, out_deg)
+
+        # each key encodes the link source * node_count + target
+        keys = np.empty(0, dtype=np.int64)
+        keys = self.add_links(rng, keys, in_counts, True)
+        out_degree = self.link_degree(keys, False)
+        keys = self.add_links(rng, keys, np.maximum(out_counts - out_degree, 0), False)
+
+        names = np.char.add("Node_", np.arange(self.node_count).astype(str))
+        subgraphs = rng.integers(1, self.subgraph + 1, size=self.node_count, dtype=np.int32)
+        csr_graph = links_to_csr(names, subgraphs, keys)
+
+        self.logger.debug(f"InternetGraph::generate_vectorized - writing {self.json_file}")
+        export_csr_json(csr_graph, self.json_file)
+        if self.binary_folder:
+            save_csr(csr_graph, self.binary_folder)
+
     def in_connect(self, node, in_count):
         for i in range(in_count):
             while True:
@@ -129,6 +215,12 @@ def parseCmdLineArgs():
     parser.add_argument("-s", "--subgraph", type=int,
                         default=5, help="Number of subgraphs to randomly divide nodes into")
 
+    parser.add_argument("-m", "--mode", type=str, default="simple", choices=["simple", "vectorized"],
+                        help="Connect nodes one at a time, or sample every degree and link in bulk with numpy for large graphs")
+
+    parser.add_argument("-b", "--binary_folder", type=str,
+                        default=None, help="Optional folder to also write the graph in memory-mappable CSR form")
+
     return parser.parse_args()
 
 
@@ -159,7 +251,10 @@ def main():
 
         # now invoke the driver program
         logger.debug("Main: Create the graph")
-        graph.generate(args.in_deg, args.out_deg)
+        if args.mode == "vectorized":
+            graph.generate_vectorized(args.in_deg, args.out_deg)
+        else:
+            graph.generate(args.in_deg, args.out_deg)
 
 
     except Exception as e:
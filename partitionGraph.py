@@ -0,0 +1,186 @@
+# Purpose:
+# Reassign the subgraph of every node so fewer links cross between peers,
+# while every subgraph stays within the allowed imbalance.
+#
+
+import logging
+import argparse
+import json
+import os
+import numpy as np
+from utils import convert_to_csr, save_csr
+
+
+class GraphPartitioner ():
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.csr_graph = None
+        self.parts = 0
+        self.capacity = 0
+        self.assignment = None
+
+    def configure(self, args):
+        self.logger.debug("GraphPartitioner::configure")
+
+        self.file_name = args.file_name
+        self.out_file_name = args.out_file_name
+        self.binary_folder = args.binary_folder
+        self.parts = args.subgraph
+        self.imbalance = args.imbalance
+        self.rounds = args.rounds
+
+        self.csr_graph = convert_to_csr(self.file_name)
+        nodes_len = len(self.csr_graph)
+        self.capacity = int(np.ceil(nodes_len / self.parts * (1 + self.imbalance)))
+
+        # links are followed both ways, a cut link costs the same in either direction
+        sources = np.repeat(np.arange(nodes_len), self.csr_graph.out_degree)
+        targets = np.asarray(self.csr_graph.out_indices)
+        nodes = np.concatenate([sources, targets])
+        order = np.argsort(nodes, kind="stable")
+        self.neighbors = np.concatenate([targets, sources])[order]
+        self.neighbor_indptr = np.zeros(nodes_len + 1, dtype=np.int64)
+        np.cumsum(np.bincount(nodes, minlength=nodes_len), out=self.neighbor_indptr[1:])
+
+    def node_neighbors(self, node):
+        return self.neighbors[self.neighbor_indptr[node]:self.neighbor_indptr[node + 1]]
+
+    def report(self, assignment, label):
+        sources = np.repeat(np.arange(len(self.csr_graph)), self.csr_graph.out_degree)
+        cut = int((assignment[sources] != assignment[self.csr_graph.out_indices]).sum())
+        sizes = np.bincount(assignment, minlength=self.parts + 1)[1:]
+        imbalance = sizes.max() / (len(self.csr_graph) / self.parts)
+        self.logger.info(
+            f"{label}: {cut} of {len(sources)} links cut ({cut / max(1, len(sources)):.1%}), "
+            f"imbalance {imbalance:.3f}, subgraph sizes {sizes.tolist()}")
+        return cut, imbalance
+
+    def stream(self):
+        # linear deterministic greedy: place each node with most of its already placed
+        # neighbors, discounted by how full that subgraph is
+        nodes_len = len(self.csr_graph)
+        assignment = np.zeros(nodes_len, dtype=np.int32)
+        sizes = np.zeros(self.parts + 1, dtype=np.int64)
+        sizes[0] = self.capacity
+
+        for node in np.random.permutation(nodes_len):
+            placed = assignment[self.node_neighbors(node)]
+            counts = np.bincount(placed, minlength=self.parts + 1).astype(np.float64)
+            scores = counts * (1 - sizes / self.capacity)
+            scores[0] = -1
+            best = np.flatnonzero(scores == scores.max())
+            part = best[np.argmin(sizes[best])]
+            assignment[node] = part
+            sizes[part] += 1
+
+        return assignment
+
+    def refine(self, assignment):
+        # label propagation: move a node to the subgraph most of its neighbors are in,
+        # as long as that subgraph has room
+        sizes = np.bincount(assignment, minlength=self.parts + 1)
+        for round_index in range(self.rounds):
+            moved = 0
+            for node in np.random.permutation(len(self.csr_graph)):
+                neighbors = self.node_neighbors(node)
+                if not len(neighbors):
+                    continue
+                counts = np.bincount(assignment[neighbors], minlength=self.parts + 1)
+                current = assignment[node]
+                open_counts = np.where(sizes < self.capacity, counts, -1)
+                open_counts[0] = -1
+                part = np.argmax(open_counts)
+                if open_counts[part] > counts[current]:
+                    assignment[node] = part
+                    sizes[current] -= 1
+                    sizes[part] += 1
+                    moved += 1
+
+            self.logger.debug(f"GraphPartitioner::refine - round {round_index} moved {moved} nodes")
+            if moved == 0:
+                break
+
+        return assignment
+
+    def partition(self):
+        self.report(np.asarray(self.csr_graph.subgraphs), "Before")
+        assignment = self.stream()
+        self.report(assignment, "Streaming")
+        self.assignment = self.refine(assignment)
+        return self.report(self.assignment, "After")
+
+    def export(self):
+        if self.out_file_name and not os.path.isdir(self.file_name):
+            self.export_json()
+
+        if self.binary_folder:
+            self.csr_graph.subgraphs = self.assignment
+            save_csr(self.csr_graph, self.binary_folder)
+
+    def export_json(self):
+        # keep every other field of the entries (like the documents of graph_ks_docs.json)
+        with open(self.file_name, "r") as f:
+            graph_list = json.load(f)
+
+        with open(self.out_file_name, "w") as f:
+            f.write("[\n")
+            for index, entry in enumerate(graph_list):
+                entry["subgraph"] = int(self.assignment[index])
+                separator = ",\n" if index < len(graph_list) - 1 else "\n"
+                f.write(json.dumps(entry) + separator)
+            f.write("]\n")
+
+
+def parseCmdLineArgs():
+    # instantiate a ArgumentParser object
+    parser = argparse.ArgumentParser(description="Partition Graph")
+
+    parser.add_argument("-f", "--file_name", type=str,
+                        default="graph.json", help="Input file for the graph")
+
+    parser.add_argument("-o", "--out_file_name", type=str,
+                        default="graph_partitioned.json", help="Output JSON graph with the new subgraphs (only for a JSON input)")
+
+    parser.add_argument("-b", "--binary_folder", type=str,
+                        default=None, help="Optional folder to also write the partitioned graph in memory-mappable CSR form")
+
+    parser.add_argument("-s", "--subgraph", type=int,
+                        default=5, help="Number of subgraphs to divide nodes into")
+
+    parser.add_argument("-e", "--imbalance", type=float,
+                        default=0.05, help="How much larger than an even share a subgraph may grow")
+
+    parser.add_argument("-r", "--rounds", type=int,
+                        default=5, help="Label propagation rounds after the streaming pass")
+
+    parser.add_argument("-l", "--loglevel", type=int, default=logging.INFO, choices=[
+                        logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL], help="logging level, choices 10,20,30,40,50: default 20=logging.INFO")
+
+    return parser.parse_args()
+
+
+def main():
+    try:
+        logger = logging.getLogger("GraphPartitioner")
+
+        args = parseCmdLineArgs()
+        logger.setLevel(args.loglevel)
+
+        partitioner = GraphPartitioner(logger)
+        partitioner.configure(args)
+        partitioner.partition()
+        partitioner.export()
+
+    except Exception as e:
+        logger.error("Exception caught in main - {}".format(e))
+        return
+
+
+if __name__ == "__main__":
+
+    # set underlying default logging capabilities
+    logging.basicConfig(level=logging.DEBUG,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    main()
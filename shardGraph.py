@@ -0,0 +1,73 @@
+
+import argparse
+import json
+import os
+import numpy as np
+from utils import convert_to_csr
+
+
+def parse():
+    # instantiate a ArgumentParser object
+    parser = argparse.ArgumentParser(description="Split the graph into one shard per subgraph")
+
+    parser.add_argument("-f", "--file_name", type=str,
+                        default="graph.json", help="Input file for the graph")
+
+    parser.add_argument("-o", "--shard_folder", type=str,
+                        default="shards", help="Output folder, one <subgraph>.json shard per subgraph")
+
+    return parser.parse_args()
+
+
+def main(args):
+    csr_graph = convert_to_csr(args.file_name)
+    names = [str(name) for name in csr_graph.names]
+    subgraphs = np.asarray(csr_graph.subgraphs).tolist()
+    out_degree = np.asarray(csr_graph.out_degree).tolist()
+    in_indptr = np.asarray(csr_graph.in_indptr).tolist()
+    in_indices = np.asarray(csr_graph.in_indices).tolist()
+    out_indptr = np.asarray(csr_graph.out_indptr).tolist()
+    out_indices = np.asarray(csr_graph.out_indices).tolist()
+
+    os.makedirs(args.shard_folder, exist_ok=True)
+
+    def entry(index):
+        return {
+            "name": names[index],
+            "id": index,
+            "subgraph": subgraphs[index],
+            "out_degree": out_degree[index]
+        }
+
+    for subgraph in sorted(set(subgraphs)):
+        nodes = []
+        ghosts = {}
+        for index in np.flatnonzero(np.asarray(csr_graph.subgraphs) == subgraph).tolist():
+            inward = in_indices[in_indptr[index]:in_indptr[index + 1]]
+            outward = out_indices[out_indptr[index]:out_indptr[index + 1]]
+
+            # remote pages keep only what the peer needs: their rank slot, owner and out degree
+            for link in inward + outward:
+                if subgraphs[link] != subgraph and link not in ghosts:
+                    ghosts[link] = entry(link)
+
+            local = entry(index)
+            local["inward_links"] = [names[link] for link in inward]
+            local["outward_links"] = [names[link] for link in outward]
+            nodes.append(local)
+
+        shard = {
+            "subgraph": subgraph,
+            "total_docs": len(names),
+            "nodes": nodes,
+            "ghosts": list(ghosts.values())
+        }
+        with open(f"{args.shard_folder}/{subgraph}.json", "w") as f:
+            json.dump(shard, f)
+
+        print(f"Subgraph {subgraph}: {len(nodes)} pages, {len(ghosts)} ghost pages")
+
+
+if __name__ == "__main__":
+    args = parse()
+    main(args)
@@ -0,0 +1,168 @@
+import json
+import argparse
+import numpy as np
+from utils import convert_to_csr, convert_page_ranking_to_dict, apply_graph_delta, save_csr, export_csr_json, gather_rows
+
+# warm started push updates: one pass over the links gives the residual of the previous
+# ranks on the edited graph, and every residual above the threshold is pushed along its
+# outward links in one vectorized round, once the frontier covers a large share of the
+# pages a round is a power iteration step over the whole residual instead
+
+
+class IncrementalSolver():
+    def __init__(self, json_file, result_file, delta_file):
+        old_graph = convert_to_csr(json_file)
+        with open(delta_file, "r") as f:
+            delta = json.load(f)
+
+        self.csr_graph, old_to_new = apply_graph_delta(old_graph, delta)
+
+        # previous ranks moved to the new indices, pages without a previous rank start at 0
+        previous = convert_page_ranking_to_dict(result_file)
+        old_names = np.asarray(old_graph.names).astype(str).tolist()
+        if list(previous) == old_names:
+            # the solvers export pages in graph order, so the ranks line up without lookups
+            old_ranks = np.fromiter(previous.values(), dtype=np.float64, count=len(old_names))
+        else:
+            old_ranks = np.array([previous.get(name, 0) for name in old_names], dtype=np.float64)
+        old_ranks /= old_ranks.sum()
+
+        self.old_len = len(old_graph)
+        self.ranks_array = np.zeros(len(self.csr_graph))
+        self.ranks_array[old_to_new[old_to_new >= 0]] = old_ranks[old_to_new >= 0]
+        self.affected = 0
+        self.pushes = 0
+        self.rounds = 0
+        self.sweeps = 0
+
+    @staticmethod
+    def frontier(residual, threshold, epsilon):
+        # the mean of the residual settles like the uniform residual, so only the part around
+        # it changes the ranks, done once that is below epsilon in total
+        if np.abs(residual - residual.mean()).sum() <= epsilon:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(np.abs(residual) > threshold)
+
+    def solve(self, alpha, epsilon, sweep_fraction=0.2):
+        nodes_len = len(self.csr_graph)
+        out_indptr = self.csr_graph.out_indptr
+        out_indices = self.csr_graph.out_indices
+        out_degree = self.csr_graph.out_degree
+
+        # scaling to the new page count keeps the total rank, the residual is taken on every
+        # page so ranks that did not solve the old graph exactly (e.g. from the dense solver) are fixed too
+        x = self.ranks_array * (self.old_len / nodes_len)
+        dangling_sum = x[out_degree == 0].sum()
+        inverse_out_degree = self.csr_graph.inverse_out_degree()
+        residual = (1 - alpha) / nodes_len + alpha * self.csr_graph.pull(x * inverse_out_degree) + \
+            alpha * dangling_sum / nodes_len - x
+        uniform = 0
+
+        threshold = epsilon / nodes_len
+        dangling = out_degree == 0
+        frontier = self.frontier(residual, threshold, epsilon)
+        self.affected = len(frontier)
+        self.pushes = 0
+        self.rounds = 0
+        self.sweeps = 0
+
+        while len(frontier):
+            self.rounds += 1
+            if len(frontier) > sweep_fraction * nodes_len:
+                # one pass over every inward link pushes all of the residual at once, its mean
+                # goes to the uniform residual first so only the part that changes the ranks is left
+                mean = residual.mean()
+                uniform += mean
+                residual -= mean
+                x += residual
+                self.pushes += nodes_len
+                uniform += alpha * residual[dangling].sum() / nodes_len
+                residual = alpha * self.csr_graph.pull(residual * inverse_out_degree)
+                self.sweeps += 1
+            else:
+                pushed = residual[frontier]
+                x[frontier] += pushed
+                residual[frontier] = 0
+                self.pushes += len(frontier)
+
+                # dangling rank goes to every page, keep it as one uniform residual
+                uniform += alpha * pushed[dangling[frontier]].sum() / nodes_len
+
+                sources = frontier[~dangling[frontier]]
+                shares = alpha * pushed[~dangling[frontier]] / out_degree[sources]
+                targets = gather_rows(out_indptr, out_indices, sources)
+                residual += np.bincount(targets, weights=np.repeat(shares, out_degree[sources]), minlength=nodes_len)
+            frontier = self.frontier(residual, threshold, epsilon)
+
+        uniform += residual.mean()
+        # a uniform residual u settles to u * n / (1 - alpha) times the PageRank vector itself
+        x += uniform * nodes_len / (1 - alpha) * (x / x.sum())
+        self.ranks_array = x / x.sum()
+
+    def export(self, file_name):
+        return_dict = {}
+        for index, name in enumerate(self.csr_graph.names):
+            return_dict[str(name)] = self.ranks_array[index]
+
+        with open(f"results/{file_name}", "w") as f:
+            json.dump(return_dict, f, indent=4)
+
+
+def parse():
+    # instantiate a ArgumentParser object
+    parser = argparse.ArgumentParser(
+        description="Update previous ranks after graph edits without solving from scratch")
+
+    parser.add_argument("-d", "--dampingFactor", type=float,
+                        default=0.85, help="The damping factor or alpha for solver (ideally betweent 0.8 to 1.0)")
+
+    parser.add_argument("-e", "--epsilon", type=float,
+                        default=1e-6, help="Total residual left unpushed, the ranks are within epsilon / (1 - alpha) in L1")
+
+    parser.add_argument("-sf", "--sweep_fraction", type=float,
+                        default=0.2, help="Share of the pages above the threshold from which a round sweeps every link")
+
+    parser.add_argument("-f", "--file_name", type=str,
+                        default="graph.json", help="Input file for the graph before the edits")
+
+    parser.add_argument("-r", "--result_file_name", type=str,
+                        default="results/result_sparse.json", help="Previous ranks of the graph before the edits (from matrixSolver -m sparse)")
+
+    parser.add_argument("-dl", "--delta_file_name", type=str,
+                        default="delta.json", help="Added and removed nodes and edges")
+
+    parser.add_argument("-og", "--out_graph_file_name", type=str,
+                        default=None, help="Optional output file for the edited graph")
+
+    parser.add_argument("-b", "--binary_folder", type=str,
+                        default=None, help="Optional folder to also write the edited graph in memory-mappable CSR form")
+
+    parser.add_argument("-of", "--out_file_name", type=str,
+                        default="result_incremental.json", help="Output file after solving")
+
+    return parser.parse_args()
+
+
+def main():
+    try:
+        args = parse()
+
+        solver = IncrementalSolver(args.file_name, args.result_file_name, args.delta_file_name)
+        solver.solve(args.dampingFactor, args.epsilon, args.sweep_fraction)
+        print(f"Updated {solver.affected} affected pages with {solver.pushes} pushes in {solver.rounds} rounds "
+              f"({solver.sweeps} full sweeps)")
+
+        solver.export(args.out_file_name)
+        if args.out_graph_file_name:
+            export_csr_json(solver.csr_graph, args.out_graph_file_name)
+        if args.binary_folder:
+            save_csr(solver.csr_graph, args.binary_folder)
+
+    except Exception as e:
+        print("Exception caught in main - {}".format(e))
+        return
+
+
+if __name__ == "__main__":
+
+    main()
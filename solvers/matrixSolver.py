@@ -1,33 +1,80 @@
 import json
 import argparse
 import numpy as np
-from utils import convert_to_page_graph, convert_to_matrix
+from utils import convert_to_page_graph, convert_to_matrix, convert_to_csr, residual_norm, export_residuals
 
 # code inspired by: https://allendowney.github.io/DSIRP/pagerank.html#adjacency-matrix
 
 
 class MatrixSolver():
-    def __init__(self, json_file):
-        self.graph_matrix = convert_to_matrix(json_file)
-        self.pr_graph = convert_to_page_graph(json_file)
+    def __init__(self, json_file, mode="dense"):
+        self.mode = mode
+        if mode == "sparse":
+            self.csr_graph = convert_to_csr(json_file)
+            self.names = self.csr_graph.names
+        else:
+            self.graph_matrix = convert_to_matrix(json_file)
+            self.names = [node.name for node in convert_to_page_graph(json_file)]
         self.ranks_array = None
-
-    def solve(self, iter, alpha, walkers):
+        self.residuals = []
+
+    def solve(self, iter, alpha, walkers, tol=0, norm="l1"):
+        if self.mode == "sparse":
+            self.solve_sparse(iter, alpha, walkers, tol, norm)
+        else:
+            self.solve_dense(iter, alpha, walkers, tol, norm)
+
+    def converged(self, result_matrix, previous_matrix, tol, norm):
+        # compare normalized ranks, the dense iteration does not preserve the total
+        residual = residual_norm(result_matrix / result_matrix.sum(),
+                                 previous_matrix / previous_matrix.sum(), norm)
+        self.residuals.append(residual)
+        return residual < tol
+
+    @property
+    def iterations_used(self):
+        return len(self.residuals)
+
+    def solve_dense(self, iter, alpha, walkers, tol=0, norm="l1"):
         nodes_len = len(self.graph_matrix)
         random_jumps = np.full((nodes_len, nodes_len), 1/nodes_len)
         google_graph_matrix = alpha * \
             self.graph_matrix + (1 - alpha) * random_jumps
         result_matrix = np.full(nodes_len, walkers)
 
+        self.residuals = []
         for i in range(iter):
+            previous_matrix = result_matrix
             result_matrix = google_graph_matrix.T @ result_matrix
+            if self.converged(result_matrix, previous_matrix, tol, norm):
+                break
+
+        self.ranks_array = result_matrix / result_matrix.sum()
+
+    def solve_sparse(self, iter, alpha, walkers, tol=0, norm="l1"):
+        # only the link structure is stored, the random jumps and the rank of
+        # dangling nodes are spread over every node as rank-1 corrections
+        nodes_len = len(self.csr_graph)
+        inverse_out_degree = self.csr_graph.inverse_out_degree()
+        dangling = self.csr_graph.out_degree == 0
+        result_matrix = np.full(nodes_len, walkers, dtype=np.float64)
+
+        self.residuals = []
+        for i in range(iter):
+            previous_matrix = result_matrix
+            dangling_sum = result_matrix[dangling].sum()
+            correction = (alpha * dangling_sum + (1 - alpha) * result_matrix.sum()) / nodes_len
+            result_matrix = alpha * \
+                self.csr_graph.pull(result_matrix * inverse_out_degree) + correction
+            if self.converged(result_matrix, previous_matrix, tol, norm):
+                break
 
         self.ranks_array = result_matrix / result_matrix.sum()
 
     def export(self, file_name):
         return_dict = {}
-        for index, node in enumerate(self.pr_graph):
-            return_dict[node.name] = self.ranks_array[index]
+        for index, name in enumerate(self.names):
+            return_dict[name] = self.ranks_array[index]
 
         with open(f"results/{file_name}", "w") as f:
             json.dump(return_dict, f, indent=4)
@@ -50,6 +97,18 @@ def parse():
     parser.add_argument("-f", "--file_name", type=str,
                         default="graph.json", help="Input file for the graph")
 
+    parser.add_argument("-t", "--tol", type=float,
+                        default=0, help="Stop once the residual between iterations is below this (0 runs every iteration)")
+
+    parser.add_argument("-n", "--norm", type=str, default="l1", choices=["l1", "linf"],
+                        help="Norm used for the residual between iterations")
+
+    parser.add_argument("-rf", "--residual_file_name", type=str,
+                        default=None, help="Optional output file for the residual of every iteration")
+
+    parser.add_argument("-m", "--mode", type=str, default="dense", choices=["dense", "sparse"],
+                        help="Dense N x N google matrix or sparse CSR links with rank-1 corrections")
+
     parser.add_argument("-of", "--out_file_name", type=str,
                         default="result_matrix.json", help="Output file after solving")
 
@@ -60,10 +119,14 @@ def main():
     try:
         args = parse()
 
-        solver = MatrixSolver(args.file_name)
-        solver.solve(args.iter, args.dampingFactor, args.walkers)
+        solver = MatrixSolver(args.file_name, args.mode)
+        solver.solve(args.iter, args.dampingFactor, args.walkers, args.tol, args.norm)
+        if solver.residuals:
+            print(f"Solved in {solver.iterations_used} iterations, final residual {solver.residuals[-1]}")
 
         solver.export(args.out_file_name)
+        if args.residual_file_name:
+            export_residuals(args.residual_file_name, solver.residuals)
 
     except Exception as e:
         print("Exception caught in main - {}".format(e))
@@ -1,6 +1,7 @@
 import argparse
 import networkx as nx
 import json
+from utils import convert_to_csr
 
 
 class PageRankSolver():
@@ -9,18 +10,15 @@ class PageRankSolver():
         self.out_file = f"results/{out_file}"
 
     def solve(self, alpha):
-        graph_list = []
         nx_dict = {}
-
-        with open(self.in_file, "r") as f:
-            graph_list = json.load(f)
-
-        for node in graph_list:
-            outList = []
-            for outNode in node["outward_links"]:
-                outList.append(str(outNode))
-
-            nx_dict[str(node["name"])] = outList
+        csr_graph = convert_to_csr(self.in_file)
+        names = [str(name) for name in csr_graph.names]
+        out_indptr = csr_graph.out_indptr.tolist()
+        out_indices = csr_graph.out_indices.tolist()
+
+        for index, name in enumerate(names):
+            nx_dict[name] = [names[out_index] for out_index in
+                             out_indices[out_indptr[index]:out_indptr[index + 1]]]
 
         nx_graph = nx.from_dict_of_lists(nx_dict, create_using=nx.DiGraph())
         pageRankAnswer = nx.pagerank(nx_graph, alpha=alpha)
@@ -0,0 +1,203 @@
+import json
+import os
+import argparse
+import numpy as np
+from multiprocessing import Barrier, Process
+from multiprocessing.shared_memory import SharedMemory
+from utils import convert_to_csr, export_residuals
+
+# power iteration over the CSR in-links, the rows are split across worker processes
+# that read the graph and both rank vectors from shared memory
+
+
+def attach(blocks, name):
+    block_name, dtype, length = blocks[name]
+    shared = SharedMemory(name=block_name)
+    return shared, np.ndarray(length, dtype=dtype, buffer=shared.buf)
+
+
+def worker(index, bounds, blocks, barrier, iter, alpha, tol, norm):
+    attached = {}
+    for name in blocks:
+        attached[name] = attach(blocks, name)
+    arrays = {name: array for name, (shared, array) in attached.items()}
+
+    ranks = [arrays["ranks_a"], arrays["ranks_b"]]
+    contributions = arrays["contributions"]
+    partials = arrays["partials"].reshape(-1, 3)
+    residuals = arrays["residuals"]
+    inverse_out_degree = arrays["inverse_out_degree"]
+    dangling = inverse_out_degree == 0
+
+    nodes_len = len(inverse_out_degree)
+    first, last = bounds[index], bounds[index + 1]
+    edge_first, edge_last = arrays["in_indptr"][first], arrays["in_indptr"][last]
+    sources = arrays["in_indices"][edge_first:edge_last]
+    targets = arrays["in_targets"][edge_first:edge_last] - first
+
+    for i in range(iter):
+        current, following = ranks[i % 2], ranks[(i + 1) % 2]
+
+        # phase 1: publish this block's contributions and rank sums
+        rows = current[first:last]
+        contributions[first:last] = rows * inverse_out_degree[first:last]
+        partials[index, 0] = rows[dangling[first:last]].sum()
+        partials[index, 1] = rows.sum()
+        barrier.wait()
+
+        # phase 2: pull the new ranks of this block from every contribution
+        correction = (alpha * partials[:, 0].sum() + (1 - alpha) * partials[:, 1].sum()) / nodes_len
+        following[first:last] = alpha * np.bincount(
+            targets, weights=contributions[sources], minlength=last - first) + correction
+        difference = np.abs(following[first:last] - rows)
+        if norm == "linf":
+            partials[index, 2] = difference.max() if len(difference) else 0
+        else:
+            partials[index, 2] = difference.sum()
+        barrier.wait()
+
+        # every worker sees the same partials, so they all stop on the same iteration
+        residual = partials[:, 2].max() if norm == "linf" else partials[:, 2].sum()
+        if index == 0:
+            residuals[i] = residual
+        if residual < tol:
+            break
+
+    for shared, array in attached.values():
+        del array
+        shared.close()
+
+
+class ParallelSolver():
+    def __init__(self, json_file, workers):
+        self.csr_graph = convert_to_csr(json_file)
+        self.workers = max(1, min(workers, len(self.csr_graph)))
+        self.ranks_array = None
+        self.residuals = []
+
+    @property
+    def iterations_used(self):
+        return len(self.residuals)
+
+    def partition(self):
+        # split rows so every worker pulls about the same number of links
+        in_indptr = np.asarray(self.csr_graph.in_indptr)
+        nodes_len = len(self.csr_graph)
+        weights = in_indptr + np.arange(nodes_len + 1)
+        goals = np.linspace(0, weights[-1], self.workers + 1)
+        bounds = np.searchsorted(weights, goals).tolist()
+        bounds[0], bounds[-1] = 0, nodes_len
+        return bounds
+
+    def share(self, shared_blocks, blocks, name, array):
+        array = np.ascontiguousarray(array)
+        shared = SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shared.buf)[:] = array
+        shared_blocks.append(shared)
+        blocks[name] = (shared.name, array.dtype.str, len(array))
+
+    def solve(self, iter, alpha, tol=0, norm="l1"):
+        nodes_len = len(self.csr_graph)
+        shared_blocks = []
+        blocks = {}
+        self.share(shared_blocks, blocks, "in_indptr", self.csr_graph.in_indptr)
+        self.share(shared_blocks, blocks, "in_indices", self.csr_graph.in_indices)
+        self.share(shared_blocks, blocks, "in_targets", self.csr_graph.in_targets)
+        self.share(shared_blocks, blocks, "inverse_out_degree", self.csr_graph.inverse_out_degree())
+        self.share(shared_blocks, blocks, "ranks_a", np.full(nodes_len, 1 / nodes_len))
+        self.share(shared_blocks, blocks, "ranks_b", np.zeros(nodes_len))
+        self.share(shared_blocks, blocks, "contributions", np.zeros(nodes_len))
+        self.share(shared_blocks, blocks, "partials", np.zeros(self.workers * 3))
+        self.share(shared_blocks, blocks, "residuals", np.full(max(1, iter), np.nan))
+
+        try:
+            bounds = self.partition()
+            barrier = Barrier(self.workers)
+            processes = [Process(target=worker, args=(index, bounds, blocks, barrier, iter, alpha, tol, norm))
+                         for index in range(self.workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+            for process in processes:
+                if process.exitcode != 0:
+                    raise RuntimeError(f"worker exited with code {process.exitcode}")
+
+            shared, residuals = attach(blocks, "residuals")
+            self.residuals = residuals[~np.isnan(residuals)][:iter].tolist()
+            del residuals
+            shared.close()
+
+            final = "ranks_a" if self.iterations_used % 2 == 0 else "ranks_b"
+            shared, ranks = attach(blocks, final)
+            self.ranks_array = ranks / ranks.sum()
+            del ranks
+            shared.close()
+        finally:
+            for shared in shared_blocks:
+                shared.close()
+                shared.unlink()
+
+    def export(self, file_name):
+        return_dict = {}
+        for index, name in enumerate(self.csr_graph.names):
+            return_dict[str(name)] = self.ranks_array[index]
+
+        with open(f"results/{file_name}", "w") as f:
+            json.dump(return_dict, f, indent=4)
+
+
+def parse():
+    # instantiate a ArgumentParser object
+    parser = argparse.ArgumentParser(
+        description="Solve Graph with parallel sparse power iteration")
+
+    parser.add_argument("-i", "--iter", type=int,
+                        default=1000, help="The amount of iterations")
+
+    parser.add_argument("-d", "--dampingFactor", type=float,
+                        default=0.85, help="The damping factor or alpha for solver (ideally betweent 0.8 to 1.0)")
+
+    parser.add_argument("-w", "--workers", type=int,
+                        default=os.cpu_count(), help="The amount of worker processes sharing the rank vectors")
+
+    parser.add_argument("-t", "--tol", type=float,
+                        default=0, help="Stop once the residual between iterations is below this (0 runs every iteration)")
+
+    parser.add_argument("-n", "--norm", type=str, default="l1", choices=["l1", "linf"],
+                        help="Norm used for the residual between iterations")
+
+    parser.add_argument("-rf", "--residual_file_name", type=str,
+                        default=None, help="Optional output file for the residual of every iteration")
+
+    parser.add_argument("-f", "--file_name", type=str,
+                        default="graph.json", help="Input file for the graph")
+
+    parser.add_argument("-of", "--out_file_name", type=str,
+                        default="result_parallel.json", help="Output file after solving")
+
+    return parser.parse_args()
+
+
+def main():
+    try:
+        args = parse()
+
+        solver = ParallelSolver(args.file_name, args.workers)
+        solver.solve(args.iter, args.dampingFactor, args.tol, args.norm)
+        if solver.residuals:
+            print(f"Solved in {solver.iterations_used} iterations, final residual {solver.residuals[-1]}")
+
+        solver.export(args.out_file_name)
+        if args.residual_file_name:
+            export_residuals(args.residual_file_name, solver.residuals)
+
+    except Exception as e:
+        print("Exception caught in main - {}".format(e))
+        return
+
+
+if __name__ == "__main__":
+
+    main()
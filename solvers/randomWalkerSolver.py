@@ -1,14 +1,21 @@
 import json
 import argparse
 from collections import Counter
+from statistics import NormalDist
 import numpy as np
-from utils import convert_to_page_graph
+from utils import convert_to_page_graph, convert_to_csr
 
 # code inspired by: https://allendowney.github.io/DSIRP/pagerank.html#random-walk
 
 class PageRankSolver():
-    def __init__(self, json_file):
-        self.pr_graph = convert_to_page_graph(json_file)
+    def __init__(self, json_file, mode="single"):
+        self.mode = mode
+        if mode == "batched":
+            self.csr_graph = convert_to_csr(json_file)
+            self.visits = np.zeros(len(self.csr_graph), dtype=np.int64)
+            self.steps = 0
+        else:
+            self.pr_graph = convert_to_page_graph(json_file)
         self.page_rank_counter = Counter()
 
     def flip(self, prob):
@@ -28,15 +35,96 @@ class PageRankSolver():
 
             self.page_rank_counter[curr_node.name] += 1
 
-    def export(self, file_name):
+    def solve_batched(self, iter, alpha, walkers, walk_length=0):
+        # every walker takes iter steps at once, a walker that stops following links
+        # (or runs out of walk_length) restarts its path from a random page
+        rng = np.random.default_rng()
+        nodes_len = len(self.csr_graph)
+        out_indptr = self.csr_graph.out_indptr
+        out_indices = self.csr_graph.out_indices
+        out_degree = self.csr_graph.out_degree
+
+        positions = rng.integers(0, nodes_len, size=walkers)
+        path_lengths = np.zeros(walkers, dtype=np.int64)
+        self.visits += np.bincount(positions, minlength=nodes_len)
 
-        total = sum(self.page_rank_counter.values())
-        for key in self.page_rank_counter:
-            self.page_rank_counter[key] /= total
+        for _ in range(iter):
+            self.step(rng, positions, path_lengths, alpha, walk_length,
+                      nodes_len, out_indptr, out_indices, out_degree)
+            self.visits += np.bincount(positions, minlength=nodes_len)
+        self.steps = iter
+
+    def solve_adaptive(self, iter, alpha, walkers, walk_length, rel_error, confidence, top_k, batch_steps):
+        # every batch of steps gives one estimate of the visit frequencies, the spread of
+        # the batch estimates bounds the error of their mean for the top_k pages
+        rng = np.random.default_rng()
+        nodes_len = len(self.csr_graph)
+        out_indptr = self.csr_graph.out_indptr
+        out_indices = self.csr_graph.out_indices
+        out_degree = self.csr_graph.out_degree
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        positions = rng.integers(0, nodes_len, size=walkers)
+        path_lengths = np.zeros(walkers, dtype=np.int64)
+        batches = 0
+        mean = np.zeros(nodes_len)
+        squares = np.zeros(nodes_len)
+        self.steps = 0
+        self.interval = np.inf
+
+        while self.steps < iter:
+            batch_visits = np.zeros(nodes_len, dtype=np.int64)
+            for _ in range(min(batch_steps, iter - self.steps)):
+                self.step(rng, positions, path_lengths, alpha, walk_length,
+                          nodes_len, out_indptr, out_indices, out_degree)
+                batch_visits += np.bincount(positions, minlength=nodes_len)
+                self.steps += 1
+            self.visits += batch_visits
+
+            # Welford update of the running mean and variance of the batch frequencies
+            batches += 1
+            frequencies = batch_visits / batch_visits.sum()
+            delta = frequencies - mean
+            mean += delta / batches
+            squares += delta * (frequencies - mean)
+
+            # too few batches make the spread itself unreliable
+            if batches < 5:
+                continue
+            top = np.argsort(mean)[-top_k:]
+            half_width = z * np.sqrt(squares[top] / (batches - 1) / batches)
+            self.interval = float((half_width / mean[top]).max())
+            if self.interval <= rel_error:
+                break
+
+    def step(self, rng, positions, path_lengths, alpha, walk_length, nodes_len, out_indptr, out_indices, out_degree):
+        degree = out_degree[positions]
+        follow = (rng.random(len(positions)) < alpha) & (degree > 0)
+        if walk_length > 0:
+            follow &= path_lengths < walk_length
+
+        walking = positions[follow]
+        picks = (rng.random(len(walking)) * degree[follow]).astype(np.int64)
+        positions[follow] = out_indices[out_indptr[walking] + picks]
+        path_lengths[follow] += 1
+
+        positions[~follow] = rng.integers(0, nodes_len, size=int((~follow).sum()))
+        path_lengths[~follow] = 0
 
+    def export(self, file_name):
         return_dict = {}
-        for node in self.pr_graph:
-            return_dict[node.name] = self.page_rank_counter[node.name]
+
+        if self.mode == "batched":
+            total = self.visits.sum()
+            for index, name in enumerate(self.csr_graph.names):
+                return_dict[str(name)] = self.visits[index] / total
+        else:
+            total = sum(self.page_rank_counter.values())
+            for key in self.page_rank_counter:
+                self.page_rank_counter[key] /= total
+
+            for node in self.pr_graph:
+                return_dict[node.name] = self.page_rank_counter[node.name]
 
         with open(f"results/{file_name}", "w") as f:
             json.dump(return_dict, f, indent=4)
@@ -48,7 +136,29 @@ def parse():
         description="Solve Graph with simple solver method")
 
     parser.add_argument("-i", "--iter", type=int,
-                        default=1000, help="The amount of iterations")
+                        default=1000, help="The amount of iterations (steps of every walker in batched mode)")
+
+    parser.add_argument("-m", "--mode", type=str, default="single", choices=["single", "batched"],
+                        help="One walker over PageNode objects, or many walkers advanced together over CSR links")
+
+    parser.add_argument("-w", "--walkers", type=int,
+                        default=10000, help="The amount of walkers moving together in batched mode")
+
+    parser.add_argument("-re", "--rel_error", type=float,
+                        default=0, help="In batched mode, stop once the top_k ranks are within this relative error (0 runs every iteration)")
+
+    parser.add_argument("-c", "--confidence", type=float,
+                        default=0.95, help="Confidence of the relative error bound")
+
+    parser.add_argument("-k", "--top_k", type=int,
+                        default=10, help="The amount of highest ranked pages the error bound applies to")
+
+    parser.add_argument("-bs", "--batch_steps", type=int,
+                        default=20, help="Steps per batch estimate when checking the error bound")
+
+    parser.add_argument("-wl", "--walk_length", type=int,
+                        default=0, help="Restart every walker after this many links in batched mode (0 only restarts on random jumps). "
+                             "Cutting walks short biases the ranks toward pages reached in few steps")
     
     parser.add_argument("-d", "--dampingFactor", type=float,
                         default=0.85, help="The damping factor or alpha for solver (ideally betweent 0.8 to 1.0)")
@@ -59,7 +169,10 @@ def parse():
     parser.add_argument("-of", "--out_file_name", type=str,
                         default="result_walker.json", help="Output file after solving")
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.rel_error and args.mode != "batched":
+        parser.error("--rel_error only applies to -m batched")
+    return args
 
 
 def main():
@@ -67,8 +180,16 @@ def main():
 
         args = parse()
 
-        solver = PageRankSolver(args.file_name)
-        solver.solve(args.iter, args.dampingFactor)
+        solver = PageRankSolver(args.file_name, args.mode)
+        if args.mode == "batched" and args.rel_error > 0:
+            solver.solve_adaptive(args.iter, args.dampingFactor, args.walkers, args.walk_length,
+                                  args.rel_error, args.confidence, args.top_k, args.batch_steps)
+            print(f"Stopped after {solver.steps} steps of {args.walkers} walkers, "
+                  f"top {args.top_k} relative error within {solver.interval} at {args.confidence} confidence")
+        elif args.mode == "batched":
+            solver.solve_batched(args.iter, args.dampingFactor, args.walkers, args.walk_length)
+        else:
+            solver.solve(args.iter, args.dampingFactor)
 
         solver.export(args.out_file_name)
 
@@ -1,18 +1,56 @@
 import json
 import argparse
-from utils import convert_to_page_graph
+import numpy as np
+from utils import convert_to_page_graph, convert_to_csr, residual_norm, export_residuals
 # code inspired by: https://github.com/chonyy/page_rank-HITS-SimRank/tree/675414a5c74d804a77869723f964f2aa3b58a53b
 
 
 class PageRankSolver ():
-    def __init__(self, json_file):
-        self.pr_graph = convert_to_page_graph(json_file)
-
-    def solve(self, iter, alpha):
+    def __init__(self, json_file, mode="object"):
+        self.mode = mode
+        if mode == "object":
+            self.pr_graph = convert_to_page_graph(json_file)
+        else:
+            # index arrays instead of PageNode objects, every page starts with rank 1 like a PageNode
+            self.csr_graph = convert_to_csr(json_file)
+            self.inverse_out_degree = self.csr_graph.inverse_out_degree()
+            if mode == "gauss_seidel":
+                # the sequential sweep is cheaper over plain lists than over tiny numpy slices
+                in_indptr = self.csr_graph.in_indptr.tolist()
+                in_indices = self.csr_graph.in_indices.tolist()
+                self.inward_lists = [in_indices[in_indptr[node]:in_indptr[node + 1]]
+                                     for node in range(len(self.csr_graph))]
+            self.ranks = np.ones(len(self.csr_graph), dtype=np.float64)
+        self.residuals = []
+
+    @property
+    def iterations_used(self):
+        return len(self.residuals)
+
+    def current_ranks(self):
+        if self.mode == "object":
+            return [node.page_rank for node in self.pr_graph]
+        return self.ranks.copy()
+
+    def solve(self, iter, alpha, tol=0, norm="l1"):
+        self.residuals = []
+        previous_ranks = np.asarray(self.current_ranks())
+        previous_ranks = previous_ranks / previous_ranks.sum()
         for i in range(iter):
-            self.one_iteration(alpha)
+            if self.mode == "jacobi":
+                self.jacobi_iteration(alpha)
+            elif self.mode == "gauss_seidel":
+                self.gauss_seidel_iteration(alpha)
+            else:
+                self.one_iteration(alpha)
             self.normalize_page_rank()
 
+            ranks = self.current_ranks()
+            self.residuals.append(residual_norm(ranks, previous_ranks, norm))
+            previous_ranks = ranks
+            if self.residuals[-1] < tol:
+                break
+
     def one_iteration(self, damping):
         for node in self.pr_graph:
             self.update(node, node.inward_nodes,
@@ -27,7 +65,31 @@ class PageRankSolver ():
         random_walk = (1 - damping) / total_nodes
         node.page_rank = random_walk + damping * page_rank_sum
 
+    def jacobi_iteration(self, damping):
+        # every page is updated from the ranks of the previous iteration
+        random_walk = (1 - damping) / len(self.ranks)
+        self.ranks = random_walk + damping * \
+            self.csr_graph.pull(self.ranks * self.inverse_out_degree)
+
+    def gauss_seidel_iteration(self, damping):
+        # same in-place order as one_iteration, later pages see the already updated ranks
+        random_walk = (1 - damping) / len(self.ranks)
+        inverse_out_degree = self.inverse_out_degree.tolist()
+        contributions = (self.ranks * self.inverse_out_degree).tolist()
+        ranks = self.ranks.tolist()
+
+        for node, sources in enumerate(self.inward_lists):
+            page_rank_sum = sum([contributions[source] for source in sources])
+            ranks[node] = random_walk + damping * page_rank_sum
+            contributions[node] = ranks[node] * inverse_out_degree[node]
+
+        self.ranks = np.array(ranks)
+
     def normalize_page_rank(self):
+        if self.mode != "object":
+            self.ranks /= self.ranks.sum()
+            return
+
         page_rank_sum = 0
 
         for node in self.pr_graph:
@@ -40,11 +102,16 @@ class PageRankSolver ():
         total = 0
         json_dict = {}
 
-        for node in self.pr_graph:
-            total += node.page_rank
+        if self.mode != "object":
+            total = self.ranks.sum()
+            for index, name in enumerate(self.csr_graph.names):
+                json_dict[name] = self.ranks[index] / total
+        else:
+            for node in self.pr_graph:
+                total += node.page_rank
 
-        for node in self.pr_graph:
-            json_dict[node.name] = node.page_rank / total
+            for node in self.pr_graph:
+                json_dict[node.name] = node.page_rank / total
 
         with open(f"results/{file_name}", "w") as f:
             json.dump(json_dict, f, indent=4)
@@ -60,9 +127,21 @@ def parse():
     parser.add_argument("-d", "--dampingFactor", type=float,
                         default=0.85, help="The damping factor or alpha for solver (ideally betweent 0.8 to 1.0)")
 
+    parser.add_argument("-t", "--tol", type=float,
+                        default=0, help="Stop once the residual between iterations is below this (0 runs every iteration)")
+
+    parser.add_argument("-n", "--norm", type=str, default="l1", choices=["l1", "linf"],
+                        help="Norm used for the residual between iterations")
+
+    parser.add_argument("-rf", "--residual_file_name", type=str,
+                        default=None, help="Optional output file for the residual of every iteration")
+
     parser.add_argument("-f", "--file_name", type=str,
                         default="graph.json", help="Input file for the graph")
 
+    parser.add_argument("-m", "--mode", type=str, default="object", choices=["object", "gauss_seidel", "jacobi"],
+                        help="PageNode object graph, or index arrays updated in place (gauss_seidel) or all at once (jacobi)")
+
     parser.add_argument("-of", "--out_file_name", type=str,
                         default="result_simple.json", help="Output file after solving")
 
@@ -73,10 +152,14 @@ def main():
     try:
         args = parse()
 
-        solver = PageRankSolver(args.file_name)
-        solver.solve(args.iter, args.dampingFactor)
+        solver = PageRankSolver(args.file_name, args.mode)
+        solver.solve(args.iter, args.dampingFactor, args.tol, args.norm)
+        if solver.residuals:
+            print(f"Solved in {solver.iterations_used} iterations, final residual {solver.residuals[-1]}")
 
         solver.export(args.out_file_name)
+        if args.residual_file_name:
+            export_residuals(args.residual_file_name, solver.residuals)
 
     except Exception as e:
         print("Exception caught in main - {}".format(e))
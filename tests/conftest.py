@@ -0,0 +1,34 @@
+import json
+import logging
+import sys
+import pytest
+from P2P.IncrementalSearch import IncrementalSearch, parse
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    # alpha (word 0) is owned by peer 1 and beta (word 1) by peer 2, they share d30 to d39
+    docs = [f"d{i}" for i in range(60)]
+    graph = [{"name": str(i), "subgraph": 1 + i % 2, "doc": [doc]} for i, doc in enumerate(docs)]
+    files = {
+        "graph.json": graph,
+        "word_to_index.json": {"alpha": 0, "beta": 1},
+        "index_to_doc.json": {"0": docs[:40], "1": docs[30:]},
+        "subgraph.json": {"1": "localhost:7401", "2": "localhost:7402"},
+    }
+    for name, content in files.items():
+        with open(tmp_path / name, "w") as f:
+            json.dump(content, f)
+    return tmp_path
+
+
+@pytest.fixture
+def make_peer(corpus, monkeypatch):
+    def make(subgraph, *options):
+        monkeypatch.setattr(sys, "argv", [
+            "IncrementalSearch", "-s", str(subgraph), "-pct", "100",
+            "-f", str(corpus / "graph.json"), "-wf", str(corpus / "word_to_index.json"),
+            "-if", str(corpus / "index_to_doc.json"), "-sf", str(corpus / "subgraph.json"),
+            "-fo", str(corpus / "ranks"), *options])
+        return IncrementalSearch(parse(), logging.getLogger("test"))
+    return make
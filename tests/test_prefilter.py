@@ -0,0 +1,44 @@
+import numpy as np
+from P2P import message_pb2
+
+
+def first_hop(peer, monkeypatch):
+    # the query starts at the owner of alpha, the hop to the owner of beta is captured
+    sent = []
+    monkeypatch.setattr(peer, "send_document_hits", lambda destination, doc_req: sent.append((destination, doc_req)))
+    doc_req = message_pb2.docReq()
+    doc_req.origin = 1
+    doc_req.ranks_version = peer.ranks_version
+    doc_req.terms[:] = [0, 1]
+    peer.handle_document_hits(doc_req)
+
+    destination, next_req = sent[0]
+    assert destination == 2
+    return set(peer.index.names(np.cumsum(next_req.doc_ids)))
+
+
+def test_peers_keep_only_their_posting_lists(make_peer):
+    first = make_peer(1)
+    second = make_peer(2)
+
+    assert len(first.index.postings(0)) == 40 and len(first.index.postings(1)) == 0
+    assert len(second.index.postings(0)) == 0 and len(second.index.postings(1)) == 30
+
+
+def test_prefilter_drops_candidates_before_the_hop(make_peer, monkeypatch):
+    first = make_peer(1, "-bf", "0.01")
+    second = make_peer(2, "-bf", "0.01")
+    first.handle_filters(second.filter_message())
+
+    forwarded = first_hop(first, monkeypatch)
+
+    shared = {f"d{i}" for i in range(30, 40)}
+    assert shared <= forwarded
+    assert len(forwarded) < 40
+    assert first.counters["pruned"] == 40 - len(forwarded)
+
+
+def test_without_filters_every_candidate_travels(make_peer, monkeypatch):
+    first = make_peer(1, "-bf", "0")
+
+    assert first_hop(first, monkeypatch) == {f"d{i}" for i in range(40)}
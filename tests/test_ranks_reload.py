@@ -0,0 +1,38 @@
+import json
+import os
+import numpy as np
+from P2P.QueryCache import QueryCache
+
+
+def write_ranks(corpus, ranks):
+    # a new mtime makes the peer see the file as changed
+    os.makedirs(corpus / "ranks", exist_ok=True)
+    path = corpus / "ranks" / "1.json"
+    with open(path, "w") as f:
+        json.dump({str(page): rank for page, rank in enumerate(ranks)}, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_reloaded_ranks_number_documents_like_a_fresh_load(corpus, make_peer):
+    # both rankings have many ties, and they split the pages differently
+    write_ranks(corpus, [page % 3 for page in range(60)])
+    reloaded = make_peer(1)
+    first_version = reloaded.ranks_version
+
+    write_ranks(corpus, [(page + 1) % 2 for page in range(60)])
+    reloaded.check_ranks(force=True)
+    fresh = make_peer(1)
+
+    assert reloaded.ranks_version != first_version
+    assert reloaded.ranks_version == fresh.ranks_version
+    assert reloaded.index.doc_names == fresh.index.doc_names
+    assert np.array_equal(reloaded.index.indices, fresh.index.indices)
+    assert reloaded.cache.counters["invalidations"] == 1
+
+
+def test_cache_key_matches_index_lookup(make_peer):
+    peer = make_peer(1)
+
+    assert QueryCache.key([" Alpha ", "alpha"]) == ("alpha",)
+    assert peer.index.word_id(" Alpha ") == peer.index.word_id("alpha") == 0
@@ -1,6 +1,6 @@
 import json
 from collections import defaultdict
-import networkx as nx
+import numpy as np
 import os
 
 class PageNode ():
@@ -10,55 +10,243 @@ class PageNode ():
         self.outward_nodes = []
         self.page_rank = 1
         self.subgraph = subgraph
+        # kept apart from outward_nodes, shards only know the outward links of their own pages
+        self.out_degree = 0
+
+class CSRGraph ():
+    def __init__(self, names, subgraphs, in_indptr, in_indices, out_indptr, out_indices, in_targets=None):
+        # in_indices[in_indptr[i]:in_indptr[i+1]] are the nodes linking to node i,
+        # out_indices[out_indptr[i]:out_indptr[i+1]] are the nodes node i links to
+        self.names = names
+        self.subgraphs = subgraphs
+        self.in_indptr = in_indptr
+        self.in_indices = in_indices
+        self.out_indptr = out_indptr
+        self.out_indices = out_indices
+        self.out_degree = np.diff(out_indptr)
+        if in_targets is None:
+            in_targets = np.repeat(
+                np.arange(len(names), dtype=in_indices.dtype), np.diff(in_indptr))
+        self.in_targets = in_targets
+
+    def __len__(self):
+        return len(self.names)
+
+    def inverse_out_degree(self):
+        inverse = np.zeros(len(self), dtype=np.float64)
+        linked = self.out_degree > 0
+        inverse[linked] = 1 / self.out_degree[linked]
+        return inverse
+
+    def pull(self, values):
+        # sum values over the inward links of every node, i.e. A.T @ values
+        return np.bincount(self.in_targets, weights=values[self.in_indices],
+                           minlength=len(self))
+
+
+def residual_norm(new_ranks, old_ranks, norm="l1"):
+    difference = np.abs(np.asarray(new_ranks) - np.asarray(old_ranks))
+    if norm == "linf":
+        return float(difference.max())
+    return float(difference.sum())
+
+def export_residuals(file_name, residuals):
+    with open(f"results/{file_name}", "w") as f:
+        json.dump({"iterations": len(residuals), "residuals": residuals}, f, indent=4)
+
+CSR_ARRAYS = ["names", "subgraphs", "in_indptr", "in_indices",
+              "out_indptr", "out_indices", "in_targets"]
+
+def save_csr(csr_graph, folder):
+    # one .npy file per array so every process can memory map the same pages
+    os.makedirs(folder, exist_ok=True)
+    for array_name in CSR_ARRAYS:
+        np.save(os.path.join(folder, f"{array_name}.npy"),
+                np.asarray(getattr(csr_graph, array_name)))
+
+def load_csr(folder):
+    arrays = {}
+    for array_name in CSR_ARRAYS:
+        arrays[array_name] = np.load(
+            os.path.join(folder, f"{array_name}.npy"), mmap_mode="r")
+    return CSRGraph(**arrays)
+
+def convert_to_csr(json_file):
+    if os.path.isdir(json_file):
+        return load_csr(json_file)
 
-def convert_to_matrix(json_file):
     graph_list = []
-    nx_dict = {}
 
     with open(json_file, "r") as f:
         graph_list = json.load(f)
 
-    for node in graph_list:
-        outList = []
-        for outNode in node["outward_links"]:
-            outList.append(str(outNode))
+    name_to_index = {}
+    for index, node in enumerate(graph_list):
+        name_to_index[str(node["name"])] = index
+
+    names = [str(node["name"]) for node in graph_list]
+    subgraphs = np.array([node.get("subgraph", 0)
+                         for node in graph_list], dtype=np.int32)
+
+    def to_csr(key):
+        indptr = np.zeros(len(graph_list) + 1, dtype=np.int64)
+        indices = []
+        for index, node in enumerate(graph_list):
+            links = [name_to_index[str(link)] for link in node[key]]
+            indices.extend(links)
+            indptr[index + 1] = indptr[index] + len(links)
+        return indptr, np.array(indices, dtype=np.int64)
+
+    in_indptr, in_indices = to_csr("inward_links")
+    out_indptr, out_indices = to_csr("outward_links")
+
+    return CSRGraph(names, subgraphs, in_indptr, in_indices, out_indptr, out_indices)
+
+def links_to_csr(names, subgraphs, keys, in_keys=None):
+    # keys encode every link as source * len(names) + target, in_keys as target * len(names) + source
+    nodes_len = max(1, len(names))
+    keys = sorted_keys(keys)
+    in_keys = sorted_keys(keys % nodes_len * nodes_len + keys // nodes_len if in_keys is None else in_keys)
+
+    out_indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // nodes_len, minlength=len(names)), out=out_indptr[1:])
+    in_targets = in_keys // nodes_len
+    in_indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(in_targets, minlength=len(names)), out=in_indptr[1:])
+
+    return CSRGraph(names, subgraphs, in_indptr, in_keys % nodes_len, out_indptr, keys % nodes_len, in_targets)
+
+def sorted_keys(keys):
+    # link keys sorted and without duplicates, the sort is skipped when they already are
+    keys = np.asarray(keys, dtype=np.int64)
+    if len(keys) > 1 and not (keys[1:] > keys[:-1]).all():
+        keys = np.sort(keys)
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+def contains_keys(sorted_keys, keys):
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
 
-        nx_dict[str(node["name"])] = outList
+def gather_rows(indptr, indices, rows):
+    # the CSR rows of every node in rows, concatenated without a python loop
+    indptr = np.asarray(indptr)
+    starts = indptr[rows]
+    lengths = indptr[np.asarray(rows) + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return np.asarray(indices)[offsets]
 
-    nx_graph = nx.from_dict_of_lists(nx_dict, create_using=nx.DiGraph())
-    graphMatrix = nx.to_numpy_array(nx_graph)
+def edit_keys(keys, remove_keys, add_keys):
+    # only the edited links are searched for, the rest of the sorted links are merged in order
+    removed = remove_keys[contains_keys(keys, remove_keys)]
+    keys = keys[~contains_keys(removed, keys)]
+    added = add_keys[~contains_keys(keys, add_keys)]
+    return np.insert(keys, np.searchsorted(keys, added), added)
 
-    for r_index, row in enumerate(graphMatrix):
-        outSum = sum(row)
-        if outSum == 0:
-            outSum = 1
+def transpose_keys(keys, nodes_len):
+    return sorted_keys(keys % max(1, nodes_len) * nodes_len + keys // max(1, nodes_len))
 
-        for c_index, col in enumerate(row):
-            graphMatrix[r_index][c_index] = graphMatrix[r_index][c_index] / outSum
+def apply_graph_delta(csr_graph, delta):
+    # delta holds "add_nodes" ({"name", "subgraph"} entries), "remove_nodes" (names),
+    # and "add_edges" / "remove_edges" ([source name, target name] pairs)
+    old_names = np.asarray(csr_graph.names).astype(str).tolist()
+    old_name_set = set(old_names)
+    removed = set(delta.get("remove_nodes", []))
+    keep = np.array([name not in removed for name in old_names], dtype=bool)
+    added = [node for node in delta.get("add_nodes", []) if node["name"] not in old_name_set]
 
-    return graphMatrix
+    names = [name for name in old_names if name not in removed] + [node["name"] for node in added]
+    subgraphs = np.concatenate([np.asarray(csr_graph.subgraphs)[keep],
+                                np.array([node.get("subgraph", 1) for node in added], dtype=np.int32)])
+    nodes_len = len(names)
+    kept_len = int(keep.sum())
+    # only the pages named by edited links need an index
+    linked = {name for edge in delta.get("add_edges", []) + delta.get("remove_edges", []) for name in edge}
+    name_to_index = {name: index for index, name in enumerate(names) if name in linked}
+
+    old_to_new = np.full(len(old_names), -1, dtype=np.int64)
+    old_to_new[keep] = np.arange(kept_len)
+
+    old_sources = np.repeat(np.arange(len(old_names)), csr_graph.out_degree)
+    old_targets = np.asarray(csr_graph.out_indices)
+    surviving = keep[old_sources] & keep[old_targets]
+    # renumbering keeps the order, so links read in CSR order usually need no sort
+    old_keys = sorted_keys(old_to_new[old_sources[surviving]] * nodes_len + old_to_new[old_targets[surviving]])
+    in_sources = np.asarray(csr_graph.in_indices)
+    in_targets = np.asarray(csr_graph.in_targets)
+    surviving = keep[in_sources] & keep[in_targets]
+    old_in_keys = sorted_keys(old_to_new[in_targets[surviving]] * nodes_len + old_to_new[in_sources[surviving]])
+
+    def to_keys(edges):
+        return sorted_keys([name_to_index[source] * nodes_len + name_to_index[target]
+                            for source, target in edges
+                            if source in name_to_index and target in name_to_index and source != target])
+
+    remove_keys = to_keys(delta.get("remove_edges", []))
+    add_keys = to_keys(delta.get("add_edges", []))
+    keys = edit_keys(old_keys, remove_keys, add_keys)
+    in_keys = edit_keys(old_in_keys, transpose_keys(remove_keys, nodes_len), transpose_keys(add_keys, nodes_len))
+    new_graph = links_to_csr(names, subgraphs, keys, in_keys)
+
+    return new_graph, old_to_new
+
+def export_csr_json(csr_graph, json_file):
+    # one compact entry per line instead of building the whole indented document in memory
+    names = [str(name) for name in csr_graph.names]
+    subgraphs = np.asarray(csr_graph.subgraphs).tolist()
+    in_indptr = np.asarray(csr_graph.in_indptr).tolist()
+    out_indptr = np.asarray(csr_graph.out_indptr).tolist()
+    in_indices = np.asarray(csr_graph.in_indices).tolist()
+    out_indices = np.asarray(csr_graph.out_indices).tolist()
+
+    with open(json_file, "w") as f:
+        f.write("[\n")
+        for index, name in enumerate(names):
+            entry = {
+                "name": name,
+                "inward_links": [names[i] for i in in_indices[in_indptr[index]:in_indptr[index + 1]]],
+                "outward_links": [names[i] for i in out_indices[out_indptr[index]:out_indptr[index + 1]]],
+                "subgraph": subgraphs[index]
+            }
+            separator = ",\n" if index < len(names) - 1 else "\n"
+            f.write(json.dumps(entry) + separator)
+        f.write("]\n")
+
+def convert_to_matrix(json_file):
+    csr_graph = convert_to_csr(json_file)
+    nodes_len = len(csr_graph)
+
+    graphMatrix = np.zeros((nodes_len, nodes_len))
+    sources = np.repeat(np.arange(nodes_len), csr_graph.out_degree)
+    graphMatrix[sources, csr_graph.out_indices] = 1
+
+    outSum = graphMatrix.sum(axis=1)
+    outSum[outSum == 0] = 1
+
+    return graphMatrix / outSum[:, None]
 
 
 def convert_to_page_graph(json_file):
-    graph_list = []
+    csr_graph = convert_to_csr(json_file)
     page_graph_list = []
 
-    with open(json_file, "r") as f:
-        graph_list = json.load(f)
+    for name, subgraph in zip(csr_graph.names, csr_graph.subgraphs.tolist()):
+        page_graph_list.append(PageNode(str(name), subgraph))
 
-    for node in graph_list:
-        page_graph_list.append(PageNode(node["name"], node["subgraph"]))
+    in_indptr = csr_graph.in_indptr.tolist()
+    in_indices = csr_graph.in_indices.tolist()
+    out_indptr = csr_graph.out_indptr.tolist()
+    out_indices = csr_graph.out_indices.tolist()
 
-    for index, node in enumerate(graph_list):
-        for in_node in node["inward_links"]:
-            in_index = int(str(in_node).split("_")[-1])
-            page_graph_list[index].inward_nodes.append(
-                page_graph_list[in_index])
+    for index, node in enumerate(page_graph_list):
+        for in_index in in_indices[in_indptr[index]:in_indptr[index + 1]]:
+            node.inward_nodes.append(page_graph_list[in_index])
 
-        for out_node in node["outward_links"]:
-            out_index = int(str(out_node).split("_")[-1])
-            page_graph_list[index].outward_nodes.append(
-                page_graph_list[out_index])
+        for out_index in out_indices[out_indptr[index]:out_indptr[index + 1]]:
+            node.outward_nodes.append(page_graph_list[out_index])
+        node.out_degree = len(node.outward_nodes)
 
     return page_graph_list
 
@@ -68,27 +256,31 @@ def load_subgraph_file(json_file):
     return subgraph_list
 
 def convert_to_page_subgraph(json_file, index):
-    graph_list = []
-    page_graph_list = []
+    page_graph_list = convert_to_page_graph(json_file)
 
-    with open(json_file, "r") as f:
-        graph_list = json.load(f)
+    return page_graph_list, len(page_graph_list)
 
-    for node in graph_list:
-        page_graph_list.append(PageNode(node["name"], node["subgraph"]))
+def convert_to_page_shard(shard_file):
+    # a shard holds the pages of one subgraph plus ghost pages for the remote ends of their links
+    with open(shard_file, "r") as f:
+        shard = json.load(f)
 
-    for index, node in enumerate(graph_list):
-        for in_node in node["inward_links"]:
-            in_index = int(str(in_node).split("_")[-1])
-            page_graph_list[index].inward_nodes.append(
-                page_graph_list[in_index])
+    page_graph_list = []
+    node_ids = []
+    name_to_node = {}
+    for entry in shard["nodes"] + shard["ghosts"]:
+        node = PageNode(entry["name"], entry["subgraph"])
+        node.out_degree = entry["out_degree"]
+        page_graph_list.append(node)
+        node_ids.append(entry["id"])
+        name_to_node[node.name] = node
 
-        for out_node in node["outward_links"]:
-            out_index = int(str(out_node).split("_")[-1])
-            page_graph_list[index].outward_nodes.append(
-                page_graph_list[out_index])
+    for entry in shard["nodes"]:
+        node = name_to_node[entry["name"]]
+        node.inward_nodes = [name_to_node[name] for name in entry["inward_links"]]
+        node.outward_nodes = [name_to_node[name] for name in entry["outward_links"]]
 
-    return page_graph_list, len(graph_list)
+    return page_graph_list, shard["total_docs"], node_ids
 
 def convert_page_ranking_to_dict(json_file):
     with open(json_file, "r") as f: